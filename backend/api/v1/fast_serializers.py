@@ -0,0 +1,324 @@
+"""
+Быстрые сериализаторы списков.
+
+Строят ответы напрямую из строк .values() и сшивают вложенные связи по
+первичным ключам, минуя создание экземпляров моделей и сериализаторов
+DRF. Вывод совпадает с выводом соответствующих сериализаторов DRF:
+    - serialize_news - NewsSerializer
+    - serialize_appeals_user - AppealUserSerializer
+    - serialize_appeals_municipal - AppealMunicipalSerializer
+
+Значения, требующие форматирования (дата и время, рейтинг, файлы),
+преобразуются теми же полями DRF, что и в обычных сериализаторах.
+"""
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from rest_framework import serializers
+
+from api.v1.querysets import COMMENT_COUNT, get_last_comments
+from info.images import get_variants
+from info.models import Answer, NewsPicture
+from user.models import Address, User
+
+ADDRESS_FIELDS: tuple[str] = (
+    'id',
+    'city',
+    'district',
+    'street',
+    'house',
+    'building',
+    'entrance',
+    'floor',
+    'apartment',
+    'index',
+    'latitude',
+    'longitude',
+)
+
+APPEAL_VALUES: tuple[str] = (
+    'id',
+    'user_id',
+    'municipal_id',
+    'topic',
+    'text',
+    'pub_date',
+    'address_id',
+    'answer',
+    'status',
+    'rating',
+)
+
+NEWS_VALUES: tuple[str] = (
+    'id',
+    'municipal_id',
+    'category__name',
+    'text',
+    'address_id',
+    'pub_date',
+    'comment_count',
+    'quiz_id',
+    'quiz__title',
+)
+
+USER_VALUES: tuple[str] = (
+    'id',
+    'email',
+    'first_name',
+    'mid_name',
+    'last_name',
+    'address_id',
+    'phone',
+    'photo',
+    'photo_variants',
+    'rating',
+    'is_municipal',
+    'municipal_name',
+)
+
+_DATETIME: serializers.DateTimeField = serializers.DateTimeField()
+_RATING: serializers.DecimalField = serializers.DecimalField(
+    max_digits=User._meta.get_field('rating').max_digits,
+    decimal_places=User._meta.get_field('rating').decimal_places,
+)
+
+
+def news_values(queryset):
+    """Возвращает строки новостей для serialize_news."""
+    return queryset.annotate(comment_count=COMMENT_COUNT).values(
+        *NEWS_VALUES
+    )
+
+
+def appeal_values(queryset):
+    """Возвращает строки обращений для serialize_appeals_*."""
+    return queryset.values(*APPEAL_VALUES)
+
+
+def serialize_appeals_municipal(rows: list[dict], request) -> list[dict]:
+    """Аналог AppealMunicipalSerializer(many=True)."""
+    users: dict[int, dict] = _get_users(
+        ids={row['user_id'] for row in rows}
+    )
+    addresses: dict[int, dict] = _get_addresses(
+        ids={row['address_id'] for row in rows}
+        | {user['address_id'] for user in users.values()}
+    )
+    return [
+        {
+            'id': row['id'],
+            'user': _user_full(
+                users.get(row['user_id']), addresses, request
+            ),
+            'topic': row['topic'],
+            'text': row['text'],
+            'pub_date': _datetime(row['pub_date']),
+            'address': addresses.get(row['address_id']),
+            'answer': row['answer'],
+            'status': row['status'],
+            'rating': row['rating'],
+        }
+        for row in rows
+    ]
+
+
+def serialize_appeals_user(rows: list[dict], request) -> list[dict]:
+    """Аналог AppealUserSerializer(many=True)."""
+    users: dict[int, dict] = _get_users(
+        ids={row['municipal_id'] for row in rows}
+    )
+    addresses: dict[int, dict] = _get_addresses(
+        ids={row['address_id'] for row in rows}
+        | {user['address_id'] for user in users.values()}
+    )
+    return [
+        {
+            'id': row['id'],
+            'municipal': _municipal(
+                users.get(row['municipal_id']), addresses, request
+            ),
+            'topic': row['topic'],
+            'text': row['text'],
+            'pub_date': _datetime(row['pub_date']),
+            'address': addresses.get(row['address_id']),
+            'answer': row['answer'],
+            'status': row['status'],
+            'rating': row['rating'],
+        }
+        for row in rows
+    ]
+
+
+def serialize_news(rows: list[dict], request) -> list[dict]:
+    """Аналог NewsSerializer(many=True) для выборки get_news_queryset."""
+    news_ids: list[int] = [row['id'] for row in rows]
+    comments: dict[int, list[dict]] = {news_id: [] for news_id in news_ids}
+    for comment in get_last_comments(news_ids).values(
+        'id', 'news_id', 'author_id', 'text', 'pub_date',
+    ):
+        comments[comment['news_id']].append(comment)
+    users: dict[int, dict] = _get_users(
+        ids={row['municipal_id'] for row in rows}
+        | {
+            comment['author_id']
+            for news_comments in comments.values()
+            for comment in news_comments
+        }
+    )
+    addresses: dict[int, dict] = _get_addresses(
+        ids={row['address_id'] for row in rows}
+        | {users[row['municipal_id']]['address_id']
+           for row in rows if row['municipal_id'] in users}
+    )
+    answers: dict[int, list[dict]] = {}
+    for answer in Answer.objects.filter(
+        quiz_id__in={row['quiz_id'] for row in rows},
+    ).order_by('id').values(
+        'id', 'quiz_id', 'text', user_count=F('vote_count'),
+    ):
+        answers.setdefault(answer.pop('quiz_id'), []).append(answer)
+    pictures: dict[int, list[dict]] = {news_id: [] for news_id in news_ids}
+    for picture in NewsPicture.objects.filter(
+        news_id__in=news_ids,
+    ).values('id', 'news_id', 'picture', 'picture_variants'):
+        pictures[picture['news_id']].append(
+            {
+                'id': picture['id'],
+                'picture': _file_url(picture['picture'], request),
+                'picture_srcset': _srcset(
+                    picture['picture_variants'], picture['picture'], request
+                ),
+            }
+        )
+    return [
+        {
+            'id': row['id'],
+            'municipal': _municipal(
+                users.get(row['municipal_id']), addresses, request
+            ),
+            'category': row['category__name'],
+            'text': row['text'],
+            'address': addresses.get(row['address_id']),
+            'pub_date': _datetime(row['pub_date']),
+            'comment_count': row['comment_count'],
+            'comment': [
+                {
+                    'id': comment['id'],
+                    'author': _user_short(users.get(comment['author_id'])),
+                    'text': comment['text'],
+                    'pub_date': _datetime(comment['pub_date']),
+                }
+                for comment in comments[row['id']]
+            ],
+            'quiz': None if row['quiz_id'] is None else {
+                'id': row['quiz_id'],
+                'title': row['quiz__title'],
+                'answer': answers.get(row['quiz_id'], []),
+            },
+            'picture': pictures[row['id']],
+        }
+        for row in rows
+    ]
+
+
+def _datetime(value) -> str:
+    if value is None:
+        return None
+    return _DATETIME.to_representation(value)
+
+
+def _file_url(name: str, request) -> str:
+    """Повторяет FileField.to_representation DRF для имени файла."""
+    if not name:
+        return None
+    url: str = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def _get_addresses(ids: set[int]) -> dict[int, dict]:
+    ids.discard(None)
+    if not ids:
+        return {}
+    return {
+        address['id']: address for address in
+        Address.objects.filter(id__in=ids).values(*ADDRESS_FIELDS)
+    }
+
+
+def _get_users(ids: set[int]) -> dict[int, dict]:
+    ids.discard(None)
+    if not ids:
+        return {}
+    return {
+        user['id']: user for user in
+        User.objects.filter(id__in=ids).values(*USER_VALUES)
+    }
+
+
+def _municipal(user: dict, addresses: dict[int, dict], request) -> dict:
+    """Аналог MunicipalSerializer."""
+    if user is None:
+        return None
+    return {
+        'id': user['id'],
+        'municipal_name': user['municipal_name'],
+        'address': addresses.get(user['address_id']),
+        'email': user['email'],
+        'phone': _phone(user['phone']),
+        'photo': _file_url(user['photo'], request),
+    }
+
+
+def _phone(value) -> str:
+    if value is None:
+        return None
+    return str(value)
+
+
+def _srcset(variants: dict[str, str], name: str, request) -> dict:
+    """Аналог api.v1.serializers.ImageVariantsField."""
+    variants: dict[str, str] = get_variants(variants=variants, name=name)
+    if variants is None:
+        return None
+    return {
+        variant: _file_url(variant_name, request)
+        for variant, variant_name in variants.items()
+    }
+
+
+def _user_full(user: dict, addresses: dict[int, dict], request) -> dict:
+    """Аналог UserFullSerializer."""
+    if user is None:
+        return None
+    return {
+        'id': user['id'],
+        'email': user['email'],
+        'first_name': user['first_name'],
+        'mid_name': user['mid_name'],
+        'last_name': user['last_name'],
+        'address': addresses.get(user['address_id']),
+        'phone': _phone(user['phone']),
+        'photo': _file_url(user['photo'], request),
+        'photo_srcset': _srcset(
+            user['photo_variants'], user['photo'], request
+        ),
+        'rating': _RATING.to_representation(user['rating']),
+        'is_municipal': user['is_municipal'],
+        'municipal_name': user['municipal_name'],
+    }
+
+
+def _user_short(user: dict) -> dict:
+    """Аналог UserShortSerializer."""
+    if user is None:
+        return None
+    return {
+        'id': user['id'],
+        'email': user['email'],
+        'first_name': user['first_name'],
+        'mid_name': user['mid_name'],
+        'last_name': user['last_name'],
+        'rating': _RATING.to_representation(user['rating']),
+    }
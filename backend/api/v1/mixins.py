@@ -0,0 +1,184 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.v1.utils import get_cache_version, parse_query_list
+
+
+class CachedResponseMixin:
+    """
+    Кэширует ответы list и retrieve во фреймворке кэша Django.
+
+    Ключ записи строится из текущей версии cache_version_key и полного
+    URL запроса: обновление версии при записи (info.signals) делает
+    старые записи недоступными, а сами они истекают через cache_timeout.
+
+    Атрибуты:
+        - cache_timeout (int) - время жизни записи кэша (сек)
+        - cache_version_key (str) - ключ версии кэша ресурса
+    """
+
+    cache_timeout: int = None
+    cache_version_key: str = None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        """Возвращает ответ из кэша или вызывает handler и кэширует ответ."""
+        version: int = get_cache_version(key=self.cache_version_key)
+        url_hash: str = hashlib.md5(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        key: str = f'{self.cache_version_key}:{version}:{url_hash}'
+        data = cache.get(key)
+        if data is not None:
+            return Response(data=data, status=status.HTTP_200_OK)
+        response: Response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=self.cache_timeout)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Поддерживает условные GET-запросы (If-None-Match, If-Modified-Since)
+    для list и retrieve.
+
+    Валидаторы ответа считаются без сериализации и запросов к БД: из
+    версии ресурса conditional_version_key, пользователя и URL запроса.
+    При совпадении валидаторов возвращается ответ 304 без тела.
+
+    Атрибуты:
+        - conditional_version_key (str) - ключ версии кэша ресурса
+    """
+
+    conditional_version_key: str = None
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self, request, **kwargs) -> tuple[str, datetime]:
+        """
+        Возвращает пару валидаторов ответа: ETag и Last-Modified.
+
+        Версия ресурса обновляется при каждой записи (info.signals),
+        поэтому валидаторы считаются без запросов к БД. Идентификатор
+        объекта, который не может быть значением поля lookup_field,
+        приводит к Http404, как в get_object.
+        """
+        lookup: str = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is not None:
+            opts = self.get_queryset().model._meta
+            try:
+                (
+                    opts.pk if self.lookup_field == 'pk'
+                    else opts.get_field(self.lookup_field)
+                ).to_python(lookup)
+            except (TypeError, ValueError, ValidationError):
+                raise Http404
+        version: int = get_cache_version(key=self.conditional_version_key)
+        etag_source: str = ':'.join(
+            str(value) for value in (
+                version,
+                request.user.pk,
+                request.get_full_path(),
+            )
+        )
+        etag: str = f'"{hashlib.md5(etag_source.encode()).hexdigest()}"'
+        last_modified: datetime = datetime.fromtimestamp(
+            version / 10**9, tz=timezone.utc,
+        )
+        return etag, last_modified
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        """Возвращает 304 при совпадении валидаторов или ответ handler."""
+        etag, last_modified = self.get_validators(request, **kwargs)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()),
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    Передает сериализатору множества полей из параметров запроса
+    ?fields= и ?expand= (api.v1.serializers.SparseFieldsMixin).
+    """
+
+    @property
+    def requested_fields(self) -> set[str]:
+        return parse_query_list(request=self.request, name='fields')
+
+    @property
+    def requested_expand(self) -> set[str]:
+        return parse_query_list(request=self.request, name='expand')
+
+    def get_serializer_context(self):
+        context: dict[str, any] = super().get_serializer_context()
+        if self.request is not None:
+            context['fields'] = self.requested_fields
+            context['expand'] = self.requested_expand
+        return context
+
+
+class FastListMixin:
+    """
+    Отдает список через быстрые сериализаторы (api.v1.fast_serializers),
+    если для запроса определен быстрый сериализатор, а клиент не
+    ограничил поля параметрами ?fields= и ?expand=.
+    """
+
+    def get_fast_list(self) -> tuple:
+        """
+        Возвращает пару (выборка .values(), быстрый сериализатор)
+        или None, если быстрый путь для запроса не предусмотрен.
+        """
+        return None
+
+    def list(self, request, *args, **kwargs):
+        fast_list: tuple = self.get_fast_list()
+        if (
+            fast_list is None
+            or self.requested_fields is not None
+            or self.requested_expand is not None
+        ):
+            return super().list(request, *args, **kwargs)
+        rows, fast_serializer = fast_list
+        page: list[dict] = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                fast_serializer(rows=page, request=request)
+            )
+        return Response(data=fast_serializer(rows=list(rows), request=request))
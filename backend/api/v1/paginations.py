@@ -0,0 +1,123 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from urban_utopia_2024.app_data import NEWS_PAGE_SIZE, NEWS_PAGE_SIZE_MAX
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset) вида (pub_date, id) в порядке убывания.
+
+    Вместо OFFSET следующая страница выбирается условием по ключу
+    последней записи предыдущей страницы, поэтому стоимость запроса
+    не зависит от глубины прокрутки.
+
+    Атрибуты:
+        - cursor_query_param (str) - имя параметра курсора в запросе
+        - date_field (str) - поле даты ключа
+        - page_size (int) - размер страницы по умолчанию
+        - page_size_query_param (str) - имя параметра размера страницы
+        - max_page_size (int) - максимальный размер страницы
+    """
+
+    cursor_query_param: str = 'cursor'
+    date_field: str = 'pub_date'
+    page_size: int = NEWS_PAGE_SIZE
+    page_size_query_param: str = 'page_size'
+    max_page_size: int = NEWS_PAGE_SIZE_MAX
+    invalid_cursor_message: str = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url: str = request.build_absolute_uri()
+        page_size: int = self.get_page_size(request)
+        cursor: tuple[str, int] = self.decode_cursor(request)
+        if cursor is not None:
+            date, pk = cursor
+            # INFO: условие date <= курсора задает границу диапазона
+            #       индекса (pub_date, id); без него OR читает индекс
+            #       с начала, и стоимость растет с глубиной страницы.
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__lt': date}) | Q(id__lt=pk),
+                **{f'{self.date_field}__lte': date},
+            )
+        results: list = list(
+            queryset.order_by(f'-{self.date_field}', '-id')[:page_size + 1]
+        )
+        self.has_next: bool = len(results) > page_size
+        self.page: list = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(
+            data={
+                'next': self.get_next_link(),
+                'results': data,
+            },
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size: int = int(
+                request.query_params[self.page_size_query_param]
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self) -> str:
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        if isinstance(last, dict):
+            date, pk = last[self.date_field], last['id']
+        else:
+            date, pk = getattr(last, self.date_field), last.id
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(date=date.isoformat(), pk=pk),
+        )
+
+    def decode_cursor(self, request) -> tuple[str, int]:
+        """Извлекает ключ (дата, id) из курсора запроса."""
+        encoded: str = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            date, pk = json.loads(base64.urlsafe_b64decode(encoded))
+            date = parse_datetime(date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk
+
+    def encode_cursor(self, date: str, pk: int) -> str:
+        """Кодирует ключ (дата, id) в строку курсора."""
+        return base64.urlsafe_b64encode(
+            json.dumps((date, pk)).encode()
+        ).decode()
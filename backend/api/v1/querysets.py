@@ -0,0 +1,201 @@
+from typing import NamedTuple
+
+from django.db.models import (
+    Count, IntegerField, OuterRef, Prefetch, QuerySet, Subquery,
+)
+from django.db.models.functions import Coalesce
+
+from info.models import Answer, Appeal, News, NewsComment
+from urban_utopia_2024.app_data import NEWS_COMMENT_PREVIEW
+from user.models import User
+
+
+class Relation(NamedTuple):
+    """
+    Связи, которые нужно загрузить для отображения поля сериализатора.
+
+    Атрибуты:
+        - select (tuple) - пути для select_related
+        - prefetch (tuple) - пути или объекты Prefetch для prefetch_related
+        - annotate (dict) - аннотации выборки
+        - expandable (bool) - поле является вложенным объектом, который
+          без параметра expand отображается идентификатором без JOIN
+    """
+
+    select: tuple = ()
+    prefetch: tuple = ()
+    annotate: dict = {}
+    expandable: bool = False
+
+
+# Ответы на опросы: количество голосов берется из Answer.vote_count,
+# куда его переносит из буфера Redis задача info.tasks.flush_vote_counts.
+ANSWER_PREFETCH: Prefetch = Prefetch(
+    'quiz__answer',
+    queryset=Answer.objects.all(),
+)
+
+# Количество комментариев новости: коррелированный подзапрос
+# по индексу (news, pub_date) вместо GROUP BY по всей выборке новостей.
+COMMENT_COUNT: Coalesce = Coalesce(
+    Subquery(
+        NewsComment.objects.filter(
+            news=OuterRef('pk'),
+        ).order_by().values('news').annotate(
+            count=Count('id'),
+        ).values('count'),
+        output_field=IntegerField(),
+    ),
+    0,
+)
+
+# Идентификаторы последних NEWS_COMMENT_PREVIEW комментариев новости:
+# k-й подзапрос читает из индекса (news, pub_date) не более k + 1 записей,
+# поэтому стоимость не зависит от общего количества комментариев.
+LAST_COMMENT_IDS: dict[str, Subquery] = {
+    f'comment_{number}': Subquery(
+        NewsComment.objects.filter(
+            news_id=OuterRef('id'),
+        ).order_by(
+            '-pub_date', '-id',
+        ).values('id')[number:number + 1]
+    )
+    for number in range(NEWS_COMMENT_PREVIEW)
+}
+
+# Планы выборок: поле сериализатора -> необходимые ему связи.
+APPEAL_ADMIN_PLAN: dict[str, Relation] = {
+    'address': Relation(select=('address',), expandable=True),
+    'municipal': Relation(select=('municipal__address',), expandable=True),
+    'user': Relation(select=('user__address',), expandable=True),
+}
+APPEAL_MUNICIPAL_PLAN: dict[str, Relation] = {
+    'address': Relation(select=('address',), expandable=True),
+    'user': Relation(select=('user__address',), expandable=True),
+}
+APPEAL_USER_PLAN: dict[str, Relation] = {
+    'address': Relation(select=('address',), expandable=True),
+    'municipal': Relation(select=('municipal__address',), expandable=True),
+}
+NEWS_PLAN: dict[str, Relation] = {
+    'address': Relation(select=('address',), expandable=True),
+    'category': Relation(select=('category',)),
+    'comment': Relation(),
+    'comment_count': Relation(annotate={'comment_count': COMMENT_COUNT}),
+    'municipal': Relation(select=('municipal__address',), expandable=True),
+    'picture': Relation(prefetch=('picture',)),
+    'quiz': Relation(
+        select=('quiz',),
+        prefetch=(ANSWER_PREFETCH,),
+        expandable=True,
+    ),
+}
+USER_PLAN: dict[str, Relation] = {
+    'address': Relation(select=('address',), expandable=True),
+}
+
+
+def apply_plan(
+    queryset: QuerySet,
+    plan: dict[str, Relation],
+    fields: set[str] = None,
+    expand: set[str] = None,
+) -> QuerySet:
+    """
+    Подгружает в выборку только связи полей, которые будут отображены.
+
+    Значение None у fields и expand означает "все поля" и "раскрыть все
+    вложенные объекты" соответственно.
+    """
+    select: list[str] = []
+    prefetch: list = []
+    annotate: dict = {}
+    for name, relation in plan.items():
+        if fields is not None and name not in fields:
+            continue
+        if (
+            relation.expandable
+            and expand is not None
+            and name not in expand
+        ):
+            continue
+        select.extend(relation.select)
+        prefetch.extend(relation.prefetch)
+        annotate.update(relation.annotate)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if annotate:
+        queryset = queryset.annotate(**annotate)
+    return queryset
+
+
+def get_appeal_queryset(
+    user: User,
+    fields: set[str] = None,
+    expand: set[str] = None,
+) -> QuerySet:
+    """
+    Возвращает обращения, доступные пользователю, со связями, которые
+    нужны сериализатору его роли для запрошенных полей.
+    """
+    if user.is_staff:
+        return apply_plan(
+            Appeal.objects.all(), APPEAL_ADMIN_PLAN, fields, expand,
+        )
+    if user.is_municipal:
+        return apply_plan(
+            Appeal.objects.filter(municipal=user),
+            APPEAL_MUNICIPAL_PLAN, fields, expand,
+        )
+    return apply_plan(
+        Appeal.objects.filter(user=user), APPEAL_USER_PLAN, fields, expand,
+    )
+
+
+def get_news_queryset(
+    fields: set[str] = None,
+    expand: set[str] = None,
+) -> QuerySet:
+    """Возвращает новости со связями запрошенных полей NewsSerializer."""
+    return apply_plan(News.objects.all(), NEWS_PLAN, fields, expand)
+
+
+def get_last_comments(news_ids: list[int]) -> QuerySet:
+    """
+    Возвращает последние NEWS_COMMENT_PREVIEW комментариев каждой новости.
+
+    Идентификаторы комментариев выбираются отдельным запросом по новостям
+    news_ids (LAST_COMMENT_IDS), сами комментарии - по первичному ключу.
+    """
+    comment_ids: set[int] = {
+        comment_id
+        for row in News.objects.filter(
+            id__in=news_ids,
+        ).order_by().values_list(*LAST_COMMENT_IDS.values())
+        for comment_id in row
+        if comment_id is not None
+    }
+    return NewsComment.objects.filter(
+        id__in=comment_ids,
+    ).order_by(
+        '-pub_date', '-id',
+    )
+
+
+def attach_last_comments(news_list: list[News]) -> None:
+    """
+    Сохраняет последние комментарии новостей в атрибут last_comments,
+    который отображает поле comment у NewsSerializer.
+    """
+    comments: dict[int, list[NewsComment]] = {
+        news.id: [] for news in news_list
+    }
+    if comments:
+        for comment in get_last_comments(
+            list(comments),
+        ).select_related('author'):
+            comments[comment.news_id].append(comment)
+    for news in news_list:
+        news.last_comments = comments[news.id]
@@ -0,0 +1,57 @@
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """Кодировщик JSON DRF с поддержкой номеров телефонов."""
+
+    def default(self, obj):
+        if isinstance(obj, PhoneNumber):
+            return str(obj)
+        return super().default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на базе orjson.
+
+    Формирует тот же вывод, что и JSONRenderer DRF (компактный JSON
+    без экранирования Unicode): типы, которые orjson не кодирует сам
+    (datetime, Decimal, PhoneNumber, ленивые строки), преобразуются
+    кодировщиком JSONEncoder. Если orjson не установлен или запрошены
+    отступы, используется стандартный JSONRenderer с тем же кодировщиком.
+    """
+
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        ret: bytes = orjson.dumps(
+            data,
+            default=self._default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # INFO: как и JSONRenderer DRF, экранирует U+2028 и U+2029,
+        #       недопустимые в строковых литералах JavaScript.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
+
+    def _default(self, obj):
+        """Кодирует типы, не поддерживаемые orjson."""
+        return self.encoder_class().default(obj)
@@ -2,6 +2,7 @@ from rest_framework import status, serializers
 from rest_framework_simplejwt.serializers import (
     TokenObtainPairSerializer, TokenRefreshSerializer,
 )
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter,
     inline_serializer, extend_schema,
@@ -11,9 +12,14 @@ from user.validators import (
     PASS_ERROR, USER_FIRST_NAME_ERROR, USER_LAST_NAME_ERROR,
 )
 from api.v1.serializers import (
-    AppealAdminSerializer, AppealAnswerSerializer, AppealRatingSerializer,
+    AnswerVoteSerializer,
+    AppealAdminSerializer, AppealAnswerSerializer, AppealExportSerializer,
+    AppealRatingSerializer,
     AppealUserSerializer, AppealUserPostSerializer,
-    EmailConfirmSerializer, NewsSerializer, NewsPostSerializer,
+    EmailConfirmSerializer, MailingSerializer, NewsCommentFullSerializer,
+    NewsDigestSerializer,
+    NewsSerializer, NewsBatchPostSerializer, NewsPostSerializer,
+    SubscriptionSerializer, UPLOADS_ERROR, UploadSerializer,
     UserFullSerializer, UserShortSerializer, UserRegisterSerializer,
 )
 from user.validators import EMAIL_ERROR
@@ -23,10 +29,32 @@ DEFAULT_401: str = 'Учетные данные не были предостав
 DEFAULT_403: str = 'У вас недостаточно прав для выполнения данного действия.'
 DEFAULT_404: str = 'Страница не найдена.'
 
+SPARSE_FIELDS_PARAMETERS: list[OpenApiParameter] = [
+    OpenApiParameter(
+        name='fields',
+        location=OpenApiParameter.QUERY,
+        description='Поля ответа через запятую (по умолчанию - все).',
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name='expand',
+        location=OpenApiParameter.QUERY,
+        description=(
+            'Вложенные объекты, раскрываемые полностью, через запятую; '
+            'остальные отображаются идентификатором (по умолчанию '
+            'раскрываются все).'
+        ),
+        required=False,
+        type=str,
+    ),
+]
+
 APPEAL_SCHEMA = {
     'list': extend_schema(
         description='Возвращает список обращений.',
         summary='Получить список обращений.',
+        parameters=SPARSE_FIELDS_PARAMETERS,
         responses={
             status.HTTP_200_OK: AppealAdminSerializer,
         },
@@ -34,6 +62,7 @@ APPEAL_SCHEMA = {
     'retrieve': extend_schema(
         description='Возвращает обращение с указанным идентификатором.',
         summary='Получить обращение.',
+        parameters=SPARSE_FIELDS_PARAMETERS,
         responses={
             status.HTTP_200_OK: AppealAdminSerializer,
             status.HTTP_401_UNAUTHORIZED: inline_serializer(
@@ -87,6 +116,34 @@ APPEAL_SCHEMA = {
             ),
         },
     ),
+    'export': extend_schema(
+        description=(
+            'Выгружает обращения в формате CSV или NDJSON потоком. '
+            'Доступно только администратору.'
+        ),
+        summary='Выгрузить обращения.',
+        parameters=[AppealExportSerializer],
+        responses={
+            (status.HTTP_200_OK, 'text/csv'): OpenApiTypes.BINARY,
+            (status.HTTP_200_OK, 'application/x-ndjson'): OpenApiTypes.BINARY,
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='appeals_export_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+            status.HTTP_403_FORBIDDEN: inline_serializer(
+                name='appeals_export_error_403',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_403,
+                    ),
+                },
+            ),
+        },
+    ),
     'post_answer': extend_schema(
         description=(
             'Оставляет ответ обращению с указанным идентификатором.'
@@ -145,6 +202,14 @@ APPEAL_SCHEMA = {
                     ),
                 },
             ),
+            status.HTTP_400_BAD_REQUEST: inline_serializer(
+                name='appeals_rate_answer_error_400',
+                fields={
+                    'detail': serializers.CharField(
+                        default='Вы уже оценили ответ обращению.',
+                    ),
+                },
+            ),
             status.HTTP_401_UNAUTHORIZED: inline_serializer(
                 name='appeals_rate_answer_error_401',
                 fields={
@@ -176,10 +241,59 @@ APPEAL_SCHEMA = {
     ),
 }
 
+MAILING_SCHEMA = {
+    'list': extend_schema(
+        description=(
+            'Возвращает рассылки писем о новостях текущей муниципальной '
+            'службы с количеством получателей, отправленных, '
+            'недоставленных и ожидающих отправки писем.'
+        ),
+        summary='Получить ход рассылок.',
+        responses={
+            status.HTTP_200_OK: MailingSerializer,
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='mailings_list_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+            status.HTTP_403_FORBIDDEN: inline_serializer(
+                name='mailings_list_error_403',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_403,
+                    ),
+                },
+            ),
+        },
+    ),
+    'retrieve': extend_schema(
+        description=(
+            'Возвращает ход рассылки текущей муниципальной службы с '
+            'указанным идентификатором.'
+        ),
+        summary='Получить ход рассылки.',
+        responses={
+            status.HTTP_200_OK: MailingSerializer,
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='mailings_retrieve_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
+}
+
 NEWS_SCHEMA = {
     'list': extend_schema(
         description='Возвращает список новостей.',
         summary='Получить список новостей.',
+        parameters=SPARSE_FIELDS_PARAMETERS,
         responses={
             status.HTTP_200_OK: NewsSerializer,
         },
@@ -187,6 +301,7 @@ NEWS_SCHEMA = {
     'retrieve': extend_schema(
         description='Возвращает новость с указанным идентификатором.',
         summary='Получить новость.',
+        parameters=SPARSE_FIELDS_PARAMETERS,
         responses={
             status.HTTP_200_OK: NewsSerializer,
             status.HTTP_404_NOT_FOUND: inline_serializer(
@@ -227,6 +342,9 @@ NEWS_SCHEMA = {
                             },
                         },
                     ),
+                    'uploads': serializers.CharField(
+                        default=UPLOADS_ERROR,
+                    ),
                 },
             ),
             status.HTTP_401_UNAUTHORIZED: inline_serializer(
@@ -247,6 +365,188 @@ NEWS_SCHEMA = {
             ),
         },
     ),
+    'batch': extend_schema(
+        description=(
+            'Создает несколько новостей в одной транзакции и отправляет '
+            'по ним одну общую рассылку.'
+        ),
+        summary='Создать несколько новостей.',
+        request=NewsBatchPostSerializer,
+        responses={
+            status.HTTP_201_CREATED: NewsSerializer(many=True),
+            status.HTTP_400_BAD_REQUEST: inline_serializer(
+                name='news_batch_error_400',
+                fields={
+                    'news': serializers.CharField(
+                        default=DEFAULT_400_REQUIRED,
+                    ),
+                },
+            ),
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='news_batch_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+            status.HTTP_403_FORBIDDEN: inline_serializer(
+                name='news_batch_error_403',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_403,
+                    ),
+                },
+            ),
+        },
+    ),
+    'comments': extend_schema(
+        description=(
+            'Возвращает комментарии новости с указанным идентификатором '
+            'от новых к старым, постранично по курсору.'
+        ),
+        summary='Получить комментарии новости.',
+        parameters=[
+            OpenApiParameter(
+                name='cursor',
+                location=OpenApiParameter.QUERY,
+                description='Курсор следующей страницы.',
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name='page_size',
+                location=OpenApiParameter.QUERY,
+                description='Количество комментариев на странице.',
+                required=False,
+                type=int,
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: NewsCommentFullSerializer(many=True),
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='news_comments_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
+    'vote': extend_schema(
+        description=(
+            'Учитывает голос пользователя за ответ в опросе новости. '
+            'Повторный голос за тот же ответ не учитывается. '
+            'Количество голосов в новости обновляется с задержкой.'
+        ),
+        summary='Проголосовать в опросе новости.',
+        request=AnswerVoteSerializer,
+        responses={
+            status.HTTP_201_CREATED: inline_serializer(
+                name='news_vote_201',
+                fields={
+                    'vote': serializers.CharField(
+                        default='Ваш голос учтен!',
+                    ),
+                },
+            ),
+            status.HTTP_200_OK: inline_serializer(
+                name='news_vote_200',
+                fields={
+                    'vote': serializers.CharField(
+                        default='Вы уже голосовали за этот ответ.',
+                    ),
+                },
+            ),
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='news_vote_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='news_vote_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
+}
+
+SUBSCRIPTION_SCHEMA = {
+    'list': extend_schema(
+        description='Возвращает подписки текущего пользователя на новости.',
+        summary='Получить список подписок.',
+        responses={
+            status.HTTP_200_OK: SubscriptionSerializer,
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='subscriptions_list_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+        },
+    ),
+    'retrieve': extend_schema(
+        description='Возвращает подписку текущего пользователя.',
+        summary='Получить подписку.',
+        responses={
+            status.HTTP_200_OK: SubscriptionSerializer,
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='subscriptions_retrieve_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
+    'create': extend_schema(
+        description=(
+            'Подписывает текущего пользователя на письма о новостях '
+            'категории услуг: в указанном районе или, если район не '
+            'указан, во всех районах.'
+        ),
+        summary='Подписаться на новости.',
+        responses={
+            status.HTTP_201_CREATED: SubscriptionSerializer,
+            status.HTTP_400_BAD_REQUEST: inline_serializer(
+                name='subscriptions_create_error_400',
+                fields={
+                    'category': serializers.CharField(
+                        default=DEFAULT_400_REQUIRED,
+                    ),
+                    'non_field_errors': serializers.CharField(
+                        default='Вы уже подписаны на эти новости.',
+                    ),
+                },
+            ),
+        },
+    ),
+    'destroy': extend_schema(
+        description='Удаляет подписку текущего пользователя.',
+        summary='Отписаться от новостей.',
+        responses={
+            status.HTTP_204_NO_CONTENT: None,
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='subscriptions_destroy_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
 }
 
 TOKEN_JWT_OBTAIN_SCHEMA: dict[str, str] = {
@@ -292,6 +592,112 @@ TOKEN_JWT_REFRESH_SCHEMA: dict[str, str] = {
     },
 }
 
+UPLOAD_SCHEMA = {
+    'list': extend_schema(
+        description='Возвращает загрузки текущей муниципальной службы.',
+        summary='Получить список загрузок.',
+        responses={
+            status.HTTP_200_OK: UploadSerializer,
+        },
+    ),
+    'retrieve': extend_schema(
+        description=(
+            'Возвращает загрузку; offset - количество полученных байт, '
+            'с которого продолжается передача файла.'
+        ),
+        summary='Получить загрузку.',
+        responses={
+            status.HTTP_200_OK: UploadSerializer,
+            status.HTTP_404_NOT_FOUND: inline_serializer(
+                name='uploads_retrieve_error_404',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_404
+                    ),
+                },
+            ),
+        },
+    ),
+    'create': extend_schema(
+        description=(
+            'Создает загрузку картинки новости с именем и размером файла. '
+            'Незавершенные загрузки удаляются через сутки.'
+        ),
+        summary='Создать загрузку.',
+        responses={
+            status.HTTP_201_CREATED: UploadSerializer,
+            status.HTTP_403_FORBIDDEN: inline_serializer(
+                name='uploads_create_error_403',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_403,
+                    ),
+                },
+            ),
+        },
+    ),
+    'chunk': extend_schema(
+        description=(
+            'Принимает часть файла в теле запроса '
+            '(application/octet-stream). Параметр offset должен совпадать '
+            'с offset загрузки, иначе возвращается 409 с текущим offset.'
+        ),
+        summary='Передать часть файла загрузки.',
+        parameters=[
+            OpenApiParameter(
+                name='offset',
+                location=OpenApiParameter.QUERY,
+                description='Смещение части в файле (байт).',
+                required=True,
+                type=int,
+            ),
+        ],
+        request={'application/octet-stream': OpenApiTypes.BINARY},
+        responses={
+            status.HTTP_200_OK: inline_serializer(
+                name='uploads_chunk_200',
+                fields={
+                    'offset': serializers.IntegerField(),
+                },
+            ),
+            status.HTTP_400_BAD_REQUEST: inline_serializer(
+                name='uploads_chunk_error_400',
+                fields={
+                    'detail': serializers.CharField(
+                        default='Часть выходит за размер файла.',
+                    ),
+                },
+            ),
+            status.HTTP_409_CONFLICT: inline_serializer(
+                name='uploads_chunk_error_409',
+                fields={
+                    'offset': serializers.IntegerField(),
+                },
+            ),
+        },
+    ),
+    'commit': extend_schema(
+        description=(
+            'Завершает загрузку, полученную полностью. Загрузка, файл '
+            'которой не является изображением, удаляется.'
+        ),
+        summary='Завершить загрузку.',
+        request=None,
+        responses={
+            status.HTTP_200_OK: UploadSerializer,
+            status.HTTP_400_BAD_REQUEST: inline_serializer(
+                name='uploads_commit_error_400',
+                fields={
+                    'detail': serializers.CharField(
+                        default='Файл получен не полностью.',
+                    ),
+                    'offset': serializers.IntegerField(),
+                },
+            ),
+        },
+    ),
+}
+
 USERS_SCHEMA = {
     'create': extend_schema(
         description='Создает нового пользователя.',
@@ -341,6 +747,7 @@ USERS_SCHEMA = {
                 required=False,
                 type=bool,
             ),
+            *SPARSE_FIELDS_PARAMETERS,
         ],
         responses={
             status.HTTP_200_OK: UserFullSerializer,
@@ -365,6 +772,7 @@ USERS_SCHEMA = {
     'retrieve': extend_schema(
         description='Возвращает пользователя с указанным идентификатором.',
         summary='Получить пользователей.',
+        parameters=SPARSE_FIELDS_PARAMETERS,
         responses={
             status.HTTP_200_OK: UserFullSerializer,
             status.HTTP_401_UNAUTHORIZED: inline_serializer(
@@ -409,6 +817,27 @@ USERS_SCHEMA = {
             ),
         },
     ),
+    'news_digest': extend_schema(
+        description=(
+            'Задает режим писем о новостях подписок: instant - письмо '
+            'на каждую новость, hourly/daily - одно письмо раз в час/день '
+            'со всеми новыми новостями. Экстренные новости приходят сразу '
+            'в любом режиме.'
+        ),
+        summary='Выбрать режим рассылки новостей.',
+        request=NewsDigestSerializer,
+        responses={
+            status.HTTP_200_OK: NewsDigestSerializer,
+            status.HTTP_401_UNAUTHORIZED: inline_serializer(
+                name='users_news_digest_error_401',
+                fields={
+                    'detail': serializers.CharField(
+                        default=DEFAULT_401,
+                    ),
+                },
+            ),
+        },
+    ),
     'me': extend_schema(
         description='Возвращает авторизованного пользователя.',
         summary='Получить авторизованного пользователя.',
@@ -1,16 +1,97 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.validators import validate_image_file_extension
 from django.db import transaction
 from drf_spectacular.utils import extend_schema_field
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
 
-from api.v1.utils import create_secret_code, send_mail
+from api.v1.querysets import attach_last_comments
+from api.v1.utils import (
+    bump_cache_versions_on_commit, create_secret_code, resolve_address,
+)
+from info.images import IMAGE_FIELDS, get_variants
 from info.models import (
-    Appeal, Answer, News, NewsComment, NewsPicture, ServiceCategory, Quiz,
+    Appeal, Answer, Mailing, News, NewsComment, NewsPicture,
+    ServiceCategory, Quiz, Upload,
 )
+from info.tasks import schedule_image_variants, send_mail_async
+from info.uploads import delete_uploads, lock_uploads, open_upload
 from urban_utopia_2024.app_data import (
-    EMAIL_REGISTER_SUBJECT, EMAIL_REGISTER_TEXT, QUIZ_ANSWER_MAX_LEN,
+    APPEAL_EXPORT_CSV, APPEAL_EXPORT_FORMATS, APPEAL_STATUS_CHOICES,
+    EMAIL_REGISTER_SUBJECT, EMAIL_REGISTER_TEXT, NEWS_BATCH_SIZE_MAX,
+    NEWS_CACHE_VERSION_KEY, QUIZ_ANSWER_MAX_LEN, UPLOAD_CHUNK_MAX_SIZE,
 )
-from user.models import Address, User
+from user.models import Address, Subscription, User, normalize_text
+
+UPLOADS_ERROR: str = 'Загрузка не найдена, не завершена или уже использована.'
+
+
+@extend_schema_field(
+    {
+        'type': 'object',
+        'nullable': True,
+        'additionalProperties': {'type': 'string', 'format': 'uri'},
+    }
+)
+class ImageVariantsField(serializers.Field):
+    """
+    Уменьшенные копии изображения объекта (info.images) в виде
+    {название копии: ссылка}; None, пока копии не созданы.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        field: str = IMAGE_FIELDS[value._meta.label]
+        variants: dict[str, str] = get_variants(
+            variants=getattr(value, f'{field}_variants'),
+            name=getattr(value, field).name,
+        )
+        if variants is None:
+            return None
+        request = self.context.get('request')
+        for variant, name in variants.items():
+            variants[variant] = default_storage.url(name)
+            if request is not None:
+                variants[variant] = request.build_absolute_uri(
+                    variants[variant]
+                )
+        return variants
+
+
+class SparseFieldsMixin:
+    """
+    Ограничивает поля сериализатора параметрами запроса ?fields= и ?expand=.
+
+    Читает из контекста множества fields и expand (None - без ограничений):
+        - поля, не указанные в fields, удаляются
+        - вложенные объекты, не указанные в expand, отображаются
+          идентификатором связанной записи
+
+    Действует только на сериализатор, которому контекст передан при
+    создании, поэтому вложенные сериализаторы не затрагиваются.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields: set[str] = self.context.get('fields')
+        expand: set[str] = self.context.get('expand')
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+        if expand is not None:
+            for name, field in list(self.fields.items()):
+                if name in expand or not isinstance(
+                    field, serializers.BaseSerializer
+                ) or isinstance(field, serializers.ListSerializer):
+                    continue
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True,
+                )
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -42,6 +123,29 @@ class AppealAnswerSerializer(serializers.ModelSerializer):
         fields = (
             'answer',
         )
+        extra_kwargs = {
+            'answer': {
+                'required': True,
+                'allow_null': False,
+                'allow_blank': False,
+            },
+        }
+
+
+class AppealExportSerializer(serializers.Serializer):
+    """Сериализатор проверки параметров выгрузки обращений."""
+
+    file_format = serializers.ChoiceField(
+        choices=APPEAL_EXPORT_FORMATS,
+        default=APPEAL_EXPORT_CSV,
+    )
+    status = serializers.ChoiceField(
+        choices=APPEAL_STATUS_CHOICES,
+        required=False,
+    )
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    municipal = serializers.IntegerField(required=False)
 
 
 class AppealRatingSerializer(serializers.ModelSerializer):
@@ -52,6 +156,9 @@ class AppealRatingSerializer(serializers.ModelSerializer):
         fields = (
             'rating',
         )
+        extra_kwargs = {
+            'rating': {'required': True, 'allow_null': False},
+        }
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -80,6 +187,12 @@ class EmailConfirmSerializer(serializers.ModelSerializer):
         )
 
 
+class AnswerVoteSerializer(serializers.Serializer):
+    """Сериализатор проверки голоса в опросе новости."""
+
+    answer = serializers.IntegerField()
+
+
 class AnswerSerializer(serializers.ModelSerializer):
     """Сериализатор представления ответов на опросы."""
 
@@ -95,13 +208,20 @@ class AnswerSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(int)
     def get_user_count(self, obj):
-        return obj.answer_user.count()
+        """
+        Возвращает количество голосов за ответ из денормализованного поля
+        vote_count без запроса к БД. Голоса, поданные через
+        NewsViewSet.vote, попадают в vote_count при очередном запуске
+        задачи info.tasks.flush_vote_counts.
+        """
+        return obj.vote_count
 
 
-class UserFullSerializer(serializers.ModelSerializer):
+class UserFullSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор полного представления данных пользователя."""
 
     address = AddressSerializer()
+    photo_srcset = ImageVariantsField()
 
     class Meta:
         model = User
@@ -114,6 +234,7 @@ class UserFullSerializer(serializers.ModelSerializer):
             'address',
             'phone',
             'photo',
+            'photo_srcset',
             'rating',
             'is_municipal',
             'municipal_name',
@@ -137,7 +258,9 @@ class MunicipalSerializer(serializers.ModelSerializer):
         )
 
 
-class AppealAdminSerializer(serializers.ModelSerializer):
+class AppealAdminSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     """
     Сериализатор представления обращения граждан.
 
@@ -164,7 +287,9 @@ class AppealAdminSerializer(serializers.ModelSerializer):
         )
 
 
-class AppealMunicipalSerializer(serializers.ModelSerializer):
+class AppealMunicipalSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     """
     Сериализатор представления обращения граждан.
 
@@ -189,7 +314,9 @@ class AppealMunicipalSerializer(serializers.ModelSerializer):
         )
 
 
-class AppealUserSerializer(serializers.ModelSerializer):
+class AppealUserSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     """
     Сериализатор представления обращения граждан.
 
@@ -235,9 +362,7 @@ class AppealUserPostSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        address, _ = Address.objects.get_or_create(
-            **validated_data.get('address')
-        )
+        address_id: int = resolve_address(validated_data.get('address'))
         user: User = User.objects.get(id=self.context.get('user_id'))
         municipal: User = User.objects.get(id=validated_data.get('municipal_id'))  # noqa (E501)
         appeal: Appeal = Appeal.objects.create(
@@ -245,7 +370,7 @@ class AppealUserPostSerializer(serializers.ModelSerializer):
             municipal=municipal,
             topic=validated_data.get('topic'),
             text=validated_data.get('text'),
-            address=address,
+            address_id=address_id,
         )
         return appeal
 
@@ -304,11 +429,14 @@ class NewsCommentFullSerializer(serializers.ModelSerializer):
 class NewsPictureSerializer(serializers.ModelSerializer):
     """Сериализатор получения картинок новости."""
 
+    picture_srcset = ImageVariantsField()
+
     class Meta:
         model = NewsPicture
         fields = (
             'id',
             'picture',
+            'picture_srcset',
         )
 
 
@@ -326,12 +454,32 @@ class QuizSerializer(serializers.ModelSerializer):
         )
 
 
-class NewsSerializer(serializers.ModelSerializer):
-    """Сериализатор получения новости."""
+class NewsListSerializer(serializers.ListSerializer):
+    """
+    Сериализатор списка новостей: последние комментарии всех новостей
+    загружаются одним запросом на весь список.
+    """
+
+    def to_representation(self, data):
+        news_list: list[News] = list(data)
+        if 'comment' in self.child.fields:
+            attach_last_comments(news_list)
+        return super().to_representation(news_list)
+
+
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Сериализатор получения новости.
+
+    Ожидает выборку api.v1.querysets.get_news_queryset: в comment
+    попадают только последние комментарии (attach_last_comments),
+    а их общее количество - в comment_count.
+    """
 
     address = AddressSerializer()
     category = serializers.CharField(source='category.name')
-    comment = NewsCommentFullSerializer(many=True)
+    comment = NewsCommentFullSerializer(source='last_comments', many=True)
+    comment_count = serializers.IntegerField()
     municipal = MunicipalSerializer()
     quiz = QuizSerializer()
     picture = NewsPictureSerializer(many=True)
@@ -345,10 +493,19 @@ class NewsSerializer(serializers.ModelSerializer):
             'text',
             'address',
             'pub_date',
+            'comment_count',
             'comment',
             'quiz',
             'picture',
         )
+        list_serializer_class = NewsListSerializer
+
+    def to_representation(self, instance):
+        if 'comment' in self.fields and not hasattr(
+            instance, 'last_comments'
+        ):
+            attach_last_comments([instance])
+        return super().to_representation(instance)
 
 
 class QuizPostSerializer(serializers.ModelSerializer):
@@ -393,6 +550,11 @@ class NewsPostSerializer(serializers.ModelSerializer):
     category = serializers.CharField()
     quiz = QuizPostSerializer(required=False)
     pictures = NewsPictureSerializer(many=True, required=False)
+    uploads = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        write_only=True,
+    )
 
     class Meta:
         model = News
@@ -402,51 +564,242 @@ class NewsPostSerializer(serializers.ModelSerializer):
             'address',
             'quiz',
             'pictures',
+            'uploads',
+            'is_emergency',
         )
 
     def validate_category(self, value):
         category: ServiceCategory = ServiceCategory.objects.filter(
             name=value,
-        )
-        if not category.exists():
+        ).first()
+        if category is None:
             raise serializers.ValidationError(
                 detail='Указанной категории новостей не существует.'
             )
-        return category.first()
+        return category
+
+    def validate_uploads(self, value):
+        """Проверяет, что загрузки завершены пользователем и не повторяются."""
+        if len(set(value)) != len(value) or Upload.objects.filter(
+            id__in=value,
+            user_id=self.context.get('municipal_id'),
+            committed=True,
+        ).count() != len(value):
+            raise serializers.ValidationError(detail=UPLOADS_ERROR)
+        return value
 
     @transaction.atomic
     def create(self, validated_data):
-        address, _ = Address.objects.get_or_create(
-            **validated_data.get('address')
-        )
+        address_id: int = resolve_address(validated_data.get('address'))
         municipal: User = User.objects.get(id=self.context.get('municipal_id'))
+        quiz: Quiz = None
+        quiz_data: dict[str, str] = validated_data.get('quiz')
+        if quiz_data:
+            quiz: Quiz = Quiz.objects.create(title=quiz_data.get('title'))
+            Answer.objects.bulk_create(
+                Answer(quiz=quiz, text=answer)
+                for answer in quiz_data.get('answers')
+            )
         news: News = News.objects.create(
             municipal=municipal,
             category=validated_data.get('category'),
             text=validated_data.get('text'),
-            address=address,
+            address_id=address_id,
+            quiz=quiz,
+            is_emergency=validated_data.get('is_emergency', False),
+        )
+        create_news_pictures(
+            news_data=((news, validated_data),),
+            user_id=municipal.id,
         )
-        quiz_data: dict[str, str] = validated_data.get('quiz')
-        if quiz_data:
-            quiz: Quiz = Quiz.objects.create(title=quiz_data.get('title'))
-            for answer in quiz_data.get('answers'):
-                Answer.objects.create(quiz=quiz, text=answer)
-            news.quiz: Quiz = quiz
-            news.save()
-        pictures_data: dict[str, str] = validated_data.get('pictures')
-        if pictures_data:
-            pictures_add: list[NewsPicture] = []
-            for picture in pictures_data:
-                pictures_add.append(
-                    NewsPicture(
-                        news=news,
-                        picture=picture.get('picture'),
-                    )
-                )
-            NewsPicture.objects.bulk_create(pictures_add)
         return news
 
 
+class NewsBatchPostSerializer(serializers.Serializer):
+    """
+    Сериализатор пакетной публикации новостей.
+
+    Новости, опросы, варианты ответов и картинки всего пакета создаются
+    в одной транзакции через bulk_create - по одному INSERT на модель.
+    """
+
+    news = NewsPostSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=NEWS_BATCH_SIZE_MAX,
+    )
+
+    def validate_news(self, value):
+        """Проверяет, что тексты новостей и опросов в пакете не повторяются."""
+        texts: list[str] = [item.get('text') for item in value]
+        titles: list[str] = [
+            item.get('quiz').get('title') for item in value if item.get('quiz')
+        ]
+        if len(set(texts)) != len(texts):
+            raise serializers.ValidationError(
+                detail='Тексты новостей в пакете не должны повторяться.'
+            )
+        if len(set(titles)) != len(titles):
+            raise serializers.ValidationError(
+                detail='Названия опросов в пакете не должны повторяться.'
+            )
+        uploads: list = [
+            upload for item in value for upload in item.get('uploads') or ()
+        ]
+        if len(set(uploads)) != len(uploads):
+            raise serializers.ValidationError(detail=UPLOADS_ERROR)
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        news_data: list[dict] = validated_data.get('news')
+        municipal: User = User.objects.get(id=self.context.get('municipal_id'))
+        quizzes: list[Quiz] = Quiz.objects.bulk_create(
+            Quiz(title=item.get('quiz').get('title'))
+            for item in news_data if item.get('quiz')
+        )
+        quizzes.reverse()
+        news_add: list[News] = []
+        answers_add: list[Answer] = []
+        for item in news_data:
+            quiz: Quiz = quizzes.pop() if item.get('quiz') else None
+            if quiz:
+                answers_add.extend(
+                    Answer(quiz=quiz, text=answer)
+                    for answer in item.get('quiz').get('answers')
+                )
+            news_add.append(
+                News(
+                    municipal=municipal,
+                    category=item.get('category'),
+                    text=item.get('text'),
+                    address_id=resolve_address(item.get('address')),
+                    quiz=quiz,
+                    is_emergency=item.get('is_emergency', False),
+                )
+            )
+        Answer.objects.bulk_create(answers_add)
+        news_list: list[News] = News.objects.bulk_create(news_add)
+        create_news_pictures(
+            news_data=zip(news_list, news_data),
+            user_id=municipal.id,
+        )
+        bump_cache_versions_on_commit(NEWS_CACHE_VERSION_KEY)
+        return news_list
+
+
+class NewsDigestSerializer(serializers.ModelSerializer):
+    """Сериализатор режима рассылки новостей пользователю."""
+
+    class Meta:
+        model = User
+        fields = (
+            'news_digest',
+        )
+        extra_kwargs = {
+            'news_digest': {'required': True},
+        }
+
+
+class MailingSerializer(serializers.ModelSerializer):
+    """Сериализатор хода рассылки писем о новостях."""
+
+    pending = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Mailing
+        fields = (
+            'id',
+            'subject',
+            'pub_date',
+            'total',
+            'sent',
+            'failed',
+            'pending',
+        )
+
+    @extend_schema_field(int)
+    def get_pending(self, obj):
+        """Возвращает количество получателей, ожидающих письма."""
+        return max(obj.total - obj.sent - obj.failed, 0)
+
+
+class SubscriptionSerializer(serializers.ModelSerializer):
+    """Сериализатор подписки на новости категории услуг."""
+
+    category = serializers.SlugRelatedField(
+        slug_field='name',
+        queryset=ServiceCategory.objects.all(),
+    )
+    district = serializers.CharField(
+        required=False,
+        allow_null=True,
+        allow_blank=True,
+    )
+
+    class Meta:
+        model = Subscription
+        fields = (
+            'id',
+            'category',
+            'district',
+        )
+
+    def validate_district(self, value):
+        """
+        Нормализует район, как Subscription.save; пустой район - подписка
+        на все районы.
+        """
+        return normalize_text(value) or None
+
+    def validate(self, attrs):
+        if Subscription.objects.filter(
+            user=self.context.get('request').user,
+            category=attrs.get('category'),
+            district=attrs.get('district'),
+        ).exists():
+            raise serializers.ValidationError(
+                detail='Вы уже подписаны на эти новости.'
+            )
+        return attrs
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    """Сериализатор загрузки файла частями."""
+
+    class Meta:
+        model = Upload
+        fields = (
+            'id',
+            'filename',
+            'size',
+            'offset',
+            'committed',
+        )
+        read_only_fields = (
+            'offset',
+            'committed',
+        )
+
+    def validate_filename(self, value):
+        """
+        Проверяет расширение имени файла, под которым картинка будет
+        сохранена в хранилище, как ImageField картинок новостей.
+        """
+        validate_image_file_extension(File(file=None, name=value))
+        return value
+
+
+class UploadChunkSerializer(serializers.Serializer):
+    """Сериализатор проверки параметров части загрузки."""
+
+    offset = serializers.IntegerField(min_value=0)
+    length = serializers.IntegerField(
+        min_value=1,
+        max_value=UPLOAD_CHUNK_MAX_SIZE,
+    )
+
+
 class UserRegisterSerializer(serializers.ModelSerializer):
     """Сериализатор регистрации пользователя."""
 
@@ -480,13 +833,15 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         isinstance: User = super().create(validated_data)
         isinstance.set_password(isinstance.password)
         isinstance.save()
-        send_mail(
-            subject=EMAIL_REGISTER_SUBJECT,
-            message=EMAIL_REGISTER_TEXT.format(
-                first_name=isinstance.first_name,
-                last_name=isinstance.last_name,
-            ),
-            to=(isinstance.email,)
+        transaction.on_commit(
+            lambda: send_mail_async.delay(
+                subject=EMAIL_REGISTER_SUBJECT,
+                message=EMAIL_REGISTER_TEXT.format(
+                    first_name=isinstance.first_name,
+                    last_name=isinstance.last_name,
+                ),
+                to=(isinstance.email,),
+            )
         )
         return isinstance
 
@@ -509,3 +864,40 @@ class UserRegisterSerializer(serializers.ModelSerializer):
                 }
             )
         return
+
+
+def create_news_pictures(news_data, user_id: int) -> list[NewsPicture]:
+    """
+    Создает картинки новостей одним INSERT.
+
+    news_data - пары (новость, данные новости): картинки берутся из
+    переданных в запросе файлов (pictures) и из завершенных загрузок
+    пользователя user_id (uploads), которые после переноса в хранилище
+    удаляются. Вызывать в транзакции.
+    """
+    news_data: list[tuple[News, dict]] = list(news_data)
+    upload_ids: list = [
+        upload_id for _, data in news_data
+        for upload_id in data.get('uploads') or ()
+    ]
+    uploads: dict = lock_uploads(upload_ids=upload_ids, user_id=user_id)
+    if len(uploads) != len(upload_ids):
+        raise serializers.ValidationError(detail={'uploads': UPLOADS_ERROR})
+    pictures: list[NewsPicture] = []
+    files: list = []
+    for news, data in news_data:
+        for picture in data.get('pictures') or ():
+            pictures.append(
+                NewsPicture(news=news, picture=picture.get('picture'))
+            )
+        for upload_id in data.get('uploads') or ():
+            files.append(open_upload(uploads[upload_id]))
+            pictures.append(NewsPicture(news=news, picture=files[-1]))
+    try:
+        NewsPicture.objects.bulk_create(pictures)
+    finally:
+        for file in files:
+            file.close()
+    delete_uploads(upload_ids=upload_ids)
+    schedule_image_variants(instances=pictures)
+    return pictures
@@ -0,0 +1,100 @@
+import timeit
+from typing import Callable
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.v1.utils import reset_address_keys
+from user.models import Address, ServiceCategory, User
+
+# Количество повторов замера: берется лучшее время, чтобы случайные
+# задержки окружения не влияли на сравнение.
+BENCHMARK_REPEAT: int = 5
+
+ADDRESS_DATA: dict[str, any] = {
+    'city': 'Екатеринбург',
+    'district': 'Центр',
+    'street': 'Ленина',
+    'house': 1,
+    'building': '1',
+    'entrance': 1,
+    'floor': 1,
+    'apartment': 1,
+    'index': 620000,
+    'latitude': 56.838011,
+    'longitude': 60.597474,
+}
+
+
+@pytest.fixture(autouse=True)
+def address_cache() -> None:
+    """Сбрасывает кэши ключей адресов, ссылающиеся на откаченные адреса."""
+    reset_address_keys()
+    return
+
+
+@pytest.fixture
+def address() -> Address:
+    return Address.objects.create(**ADDRESS_DATA)
+
+
+@pytest.fixture
+def category() -> ServiceCategory:
+    return ServiceCategory.objects.create(name='Water')
+
+
+@pytest.fixture
+def admin() -> User:
+    return User.objects.create_superuser(
+        email='admin@email.com',
+        password='Pass!123',
+        phone='+79990000001',
+        first_name='Админ',
+        last_name='Админов',
+    )
+
+
+@pytest.fixture
+def municipal(address) -> User:
+    return User.objects.create_municipal(
+        email='municipal@email.com',
+        password='Pass!123',
+        phone='+79990000002',
+        first_name='Служба',
+        last_name='Службова',
+        municipal_name='Водоканал',
+        address=address,
+    )
+
+
+@pytest.fixture
+def citizen(address) -> User:
+    return User.objects.create_user(
+        email='citizen@email.com',
+        password='Pass!123',
+        phone='+79990000003',
+        first_name='Иван',
+        last_name='Иванов',
+        mid_name='Петрович',
+        address=address,
+    )
+
+
+@pytest.fixture
+def api_client():
+    def make_client(user: User = None) -> APIClient:
+        client: APIClient = APIClient()
+        if user is not None:
+            client.force_authenticate(user=user)
+        return client
+    return make_client
+
+
+@pytest.fixture
+def best_time() -> Callable:
+    """Возвращает лучшее из BENCHMARK_REPEAT времен number вызовов func."""
+    def measure(func: Callable, number: int = 1) -> float:
+        return min(
+            timeit.repeat(func, number=number, repeat=BENCHMARK_REPEAT)
+        )
+    return measure
@@ -0,0 +1,115 @@
+import csv
+from datetime import datetime, timedelta
+import io
+import json
+
+from django.utils import timezone
+import pytest
+
+from info.models import Appeal
+from urban_utopia_2024.app_data import (
+    APPEAL_EXPORT_FIELDS, APPEAL_STAGE_COMPLETED, APPEAL_STAGE_INITIAL,
+)
+from user.models import User
+
+
+@pytest.fixture
+def appeals(citizen, municipal, address) -> list[Appeal]:
+    """Обращения с разными статусами, датами и службами."""
+    other: User = User.objects.create_municipal(
+        email='other@email.com',
+        password='Pass!123',
+        phone='+79990000004',
+        first_name='Служба',
+        last_name='Другая',
+        municipal_name='Горсвет',
+        address=address,
+    )
+    appeals: list[Appeal] = [
+        Appeal.objects.create(
+            user=citizen,
+            municipal=municipal if i % 2 else other,
+            topic='Тема',
+            text=f'Текст "{i}", с запятой\nи переносом',
+            address=address,
+            status=APPEAL_STAGE_COMPLETED if i % 3 else APPEAL_STAGE_INITIAL,
+        ) for i in range(6)
+    ]
+    Appeal.objects.filter(id=appeals[0].id).update(
+        pub_date=timezone.now() - timedelta(days=10),
+    )
+    return appeals
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'role, status_code',
+    ((None, 401), ('citizen', 403), ('municipal', 403), ('admin', 200)),
+)
+def test_export_admin_only(request, api_client, appeals, role, status_code):
+    """Выгрузка доступна только администратору."""
+    user: User = request.getfixturevalue(role) if role else None
+    response = api_client(user).get('/api/v1/appeals/export/')
+    assert response.status_code == status_code
+
+
+@pytest.mark.django_db
+def test_export_csv(api_client, admin, appeals):
+    """CSV с фильтром по статусу: заголовок и подходящие обращения."""
+    response = api_client(admin).get(
+        '/api/v1/appeals/export/',
+        {'file_format': 'csv', 'status': APPEAL_STAGE_COMPLETED},
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    assert 'appeals.csv' in response['Content-Disposition']
+    rows: list[list[str]] = list(
+        csv.reader(io.StringIO(b''.join(response.streaming_content).decode()))
+    )
+    assert tuple(rows[0]) == APPEAL_EXPORT_FIELDS
+    expected: list[Appeal] = [
+        appeal for appeal in appeals
+        if appeal.status == APPEAL_STAGE_COMPLETED
+    ]
+    assert [int(row[0]) for row in rows[1:]] == [
+        appeal.id for appeal in expected
+    ]
+    assert [row[4] for row in rows[1:]] == [
+        appeal.text for appeal in expected
+    ]
+
+
+@pytest.mark.django_db
+def test_export_ndjson(api_client, admin, municipal, appeals):
+    """NDJSON с фильтрами по службе и дате: объект на строку."""
+    response = api_client(admin).get(
+        '/api/v1/appeals/export/',
+        {
+            'file_format': 'ndjson',
+            'municipal': municipal.id,
+            'date_from': (timezone.now() - timedelta(days=1)).isoformat(),
+        },
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    rows: list[dict] = [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+    assert [row['id'] for row in rows] == [
+        appeal.id for appeal in appeals[1:]
+        if appeal.municipal_id == municipal.id
+    ]
+    assert all(tuple(row) == APPEAL_EXPORT_FIELDS for row in rows)
+    assert rows[0]['municipal__municipal_name'] == 'Водоканал'
+    assert datetime.fromisoformat(rows[0]['pub_date']).tzinfo is not None
+
+
+@pytest.mark.django_db
+def test_export_bad_format(api_client, admin):
+    """Неизвестный формат выгрузки отклоняется."""
+    response = api_client(admin).get(
+        '/api/v1/appeals/export/',
+        {'file_format': 'xml'},
+    )
+    assert response.status_code == 400
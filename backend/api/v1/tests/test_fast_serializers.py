@@ -0,0 +1,226 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.v1 import fast_serializers
+from api.v1.querysets import get_appeal_queryset, get_news_queryset
+from api.v1.tests.test_querysets import create_appeals
+from api.v1.serializers import (
+    AppealMunicipalSerializer, AppealUserSerializer, NewsSerializer,
+)
+from info.models import (
+    Answer, AnswerUser, Appeal, News, NewsComment, NewsPicture, Quiz,
+)
+
+NEWS_ORDERING: tuple[str] = ('-pub_date', '-id')
+
+
+@pytest.fixture
+def request_context() -> Request:
+    return Request(APIRequestFactory().get('/api/v1/'))
+
+
+@pytest.fixture
+def news(citizen, municipal, address, category) -> None:
+    """
+    Новости со всеми вариантами полей: без службы и со службой, с опросом
+    и голосами, с картинками и разным числом комментариев.
+    """
+    municipal.photo = 'users/avatars/photo.png'
+    municipal.save()
+    quiz: Quiz = Quiz.objects.create(title='Опрос')
+    answers: list[Answer] = Answer.objects.bulk_create(
+        Answer(quiz=quiz, text=text) for text in ('Да', 'Нет')
+    )
+    AnswerUser.objects.create(answer=answers[0], user=citizen)
+    for i in range(12):
+        news: News = News.objects.create(
+            municipal=municipal if i % 3 else None,
+            category=category,
+            text=f'Новость {i}',
+            address=address,
+            quiz=quiz if i % 2 else None,
+            is_emergency=i == 5,
+        )
+        if i % 4 == 0:
+            NewsPicture.objects.create(
+                news=news,
+                picture=f'news/pictures/picture{i}.png',
+            )
+        NewsComment.objects.bulk_create(
+            NewsComment(news=news, author=citizen, text=f'Комментарий {j}')
+            for j in range(i % 6)
+        )
+    return
+
+
+@pytest.fixture
+def appeals(citizen, municipal, address) -> None:
+    """Обращения с пустыми и заполненными необязательными полями."""
+    for i in range(12):
+        Appeal.objects.create(
+            user=citizen if i % 4 else None,
+            municipal=municipal,
+            topic='Тема',
+            text=f'Обращение {i}',
+            address=address if i % 2 else None,
+            answer='Ответ' if i % 3 else None,
+            rating=5 if i % 3 else None,
+        )
+    return
+
+
+def render(data) -> bytes:
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+def test_news_parity(news, request_context):
+    """Быстрый сериализатор новостей отдает тот же JSON, что и DRF."""
+    expected: bytes = render(
+        NewsSerializer(
+            get_news_queryset().order_by(*NEWS_ORDERING),
+            many=True,
+            context={'request': request_context},
+        ).data
+    )
+    rows: list[dict] = list(
+        fast_serializers.news_values(
+            get_news_queryset(fields=set())
+        ).order_by(*NEWS_ORDERING)
+    )
+    assert len(rows) == 12
+    assert render(
+        fast_serializers.serialize_news(rows=rows, request=request_context)
+    ) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'role, serializer, fast_serializer',
+    (
+        (
+            'citizen',
+            AppealUserSerializer,
+            fast_serializers.serialize_appeals_user,
+        ),
+        (
+            'municipal',
+            AppealMunicipalSerializer,
+            fast_serializers.serialize_appeals_municipal,
+        ),
+    ),
+)
+def test_appeal_parity(
+    request, appeals, request_context, role, serializer, fast_serializer,
+):
+    """Быстрые сериализаторы обращений отдают тот же JSON, что и DRF."""
+    user = request.getfixturevalue(role)
+    expected: bytes = render(
+        serializer(
+            get_appeal_queryset(user=user),
+            many=True,
+            context={'request': request_context},
+        ).data
+    )
+    rows: list[dict] = list(
+        fast_serializers.appeal_values(
+            get_appeal_queryset(user=user, fields=set())
+        )
+    )
+    assert rows
+    assert render(
+        fast_serializer(rows=rows, request=request_context)
+    ) == expected
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_appeal_serializer_benchmark(
+    request_context, best_time, citizen, municipal, address,
+):
+    """Быстрый сериализатор списка обращений быстрее DRF."""
+    create_appeals(
+        count=1000,
+        citizen=citizen,
+        municipal=municipal,
+        address=address,
+    )
+    context: dict = {'request': request_context}
+
+    def drf() -> bytes:
+        return render(
+            AppealMunicipalSerializer(
+                get_appeal_queryset(user=municipal),
+                many=True,
+                context=context,
+            ).data
+        )
+
+    def fast() -> bytes:
+        return render(
+            fast_serializers.serialize_appeals_municipal(
+                rows=list(
+                    fast_serializers.appeal_values(
+                        get_appeal_queryset(user=municipal, fields=set())
+                    )
+                ),
+                request=request_context,
+            )
+        )
+
+    assert fast() == drf()
+    drf_time: float = best_time(drf)
+    fast_time: float = best_time(fast)
+    print(f'\nDRF: {drf_time:.4f} с, быстрый: {fast_time:.4f} с')
+    assert fast_time < drf_time
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_news_serializer_benchmark(
+    request_context, best_time, citizen, municipal, address, category,
+):
+    """Быстрый сериализатор страницы новостей быстрее DRF."""
+    news_list: list[News] = News.objects.bulk_create(
+        News(
+            municipal=municipal,
+            category=category,
+            text=f'Новость {i}',
+            address=address,
+        ) for i in range(100)
+    )
+    NewsComment.objects.bulk_create(
+        NewsComment(news=news, author=citizen, text=f'Комментарий {j}')
+        for news in news_list
+        for j in range(5)
+    )
+    context: dict = {'request': request_context}
+
+    def drf() -> bytes:
+        return render(
+            NewsSerializer(
+                get_news_queryset().order_by(*NEWS_ORDERING),
+                many=True,
+                context=context,
+            ).data
+        )
+
+    def fast() -> bytes:
+        return render(
+            fast_serializers.serialize_news(
+                rows=list(
+                    fast_serializers.news_values(
+                        get_news_queryset(fields=set())
+                    ).order_by(*NEWS_ORDERING)
+                ),
+                request=request_context,
+            )
+        )
+
+    assert fast() == drf()
+    drf_time: float = best_time(drf)
+    fast_time: float = best_time(fast)
+    print(f'\nDRF: {drf_time:.4f} с, быстрый: {fast_time:.4f} с')
+    assert fast_time < drf_time
@@ -0,0 +1,36 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+import pytest
+
+from info.images import make_variants
+from urban_utopia_2024.app_data import IMAGE_VARIANTS
+
+
+@pytest.fixture
+def photo(settings, tmp_path) -> str:
+    """Большая фотография JPEG в хранилище с поворотом в EXIF."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    exif: Image.Exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer: BytesIO = BytesIO()
+    Image.new('RGB', (4000, 3000), 'red').save(
+        buffer, format='JPEG', exif=exif,
+    )
+    return default_storage.save(
+        'news/photo.jpg',
+        ContentFile(buffer.getvalue()),
+    )
+
+
+def test_make_variants(photo):
+    """Копии повернуты по EXIF и уменьшены до размеров IMAGE_VARIANTS."""
+    variants: dict[str, str] = make_variants(photo)
+    assert variants['source'] == photo
+    for variant, (size, image_format) in IMAGE_VARIANTS.items():
+        with default_storage.open(variants[variant]) as file:
+            image: Image.Image = Image.open(file)
+            assert image.size == (size * 3 // 4, size)
+            assert image.format == (image_format or 'JPEG')
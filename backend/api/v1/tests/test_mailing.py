@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from info import mailing, tasks
+from info.models import News
+from urban_utopia_2024.app_data import NEWS_DIGEST_HOURLY
+from user.models import Subscription, User
+
+
+@pytest.mark.django_db
+def test_digest_retry_resumes(monkeypatch, address, category):
+    """Повтор задачи дайджеста не отправляет уже отправленные письма."""
+    users: list[User] = User.objects.bulk_create(
+        User(
+            email=f'user{i}@email.com',
+            username=f'user{i}',
+            phone=f'+7997{i:07d}',
+            first_name='Петр',
+            last_name='Петров',
+            news_digest=NEWS_DIGEST_HOURLY,
+        ) for i in range(5)
+    )
+    Subscription.objects.bulk_create(
+        Subscription(user=user, category=category) for user in users
+    )
+    news: News = News.objects.create(
+        category=category,
+        text='Новость',
+        address=address,
+    )
+    sent: list[str] = []
+    calls: list[str] = []
+
+    def send_mail_messages(subject, messages):
+        for email, _ in messages:
+            calls.append(email)
+            if len(calls) == 3:
+                raise ConnectionResetError
+            sent.append(email)
+
+    monkeypatch.setattr(mailing, 'acquire_mail_tokens', lambda count: 0)
+    monkeypatch.setattr(tasks, 'send_mail_messages', send_mail_messages)
+    tasks.send_news_digest.apply(
+        kwargs={
+            'period': NEWS_DIGEST_HOURLY,
+            'news_ids': [news.id],
+            'min_id': users[0].id,
+            'max_id': users[-1].id,
+        },
+    )
+    assert sent == [user.email for user in users]
+
+
+@pytest.mark.django_db
+def test_backfill_subscriptions(citizen, municipal, admin, category):
+    """Первый запуск подписывает граждан на все категории, повторный - нет."""
+    call_command('backfill_subscriptions', stdout=StringIO())
+    assert list(
+        Subscription.objects.values_list('user', 'category', 'district')
+    ) == [(citizen.id, category.id, None)]
+    Subscription.objects.all().delete()
+    Subscription.objects.create(user=admin, category=category)
+    call_command('backfill_subscriptions', stdout=StringIO())
+    assert not Subscription.objects.filter(user=citizen).exists()
+
+
+@pytest.mark.django_db
+def test_recipients_district_case(citizen, category):
+    """Район подписки сравнивается без учета регистра и пробелов."""
+    Subscription.objects.create(
+        user=citizen,
+        category=category,
+        district=' центр ',
+    )
+    assert list(
+        mailing.get_recipients(category_id=category.id, district='Центр')
+    ) == [citizen]
@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.v1.paginations import KeysetPagination
+from info.models import News
+from urban_utopia_2024.app_data import NEWS_PAGE_SIZE
+
+DEEP_PAGE: int = 1000
+
+
+@pytest.fixture
+def news_ids(address, category) -> list[int]:
+    """
+    Новости на DEEP_PAGE страниц; возвращает их id в порядке пагинации.
+    """
+    News.objects.bulk_create(
+        (
+            News(category=category, text=f'Новость {i}', address=address)
+            for i in range(DEEP_PAGE * NEWS_PAGE_SIZE)
+        ),
+        batch_size=1000,
+    )
+    return list(
+        News.objects.order_by('-pub_date', '-id').values_list('id', flat=True)
+    )
+
+
+def get_request(page: int) -> Request:
+    """Возвращает запрос страницы page с курсором последней новости."""
+    params: dict = {}
+    if page > 1:
+        last: News = News.objects.order_by('-pub_date', '-id')[
+            (page - 1) * NEWS_PAGE_SIZE - 1
+        ]
+        params[KeysetPagination.cursor_query_param] = (
+            KeysetPagination().encode_cursor(
+                date=last.pub_date.isoformat(),
+                pk=last.id,
+            )
+        )
+    return Request(APIRequestFactory().get('/api/v1/news/', params))
+
+
+def paginate(request: Request) -> list[int]:
+    return [
+        news.id for news in KeysetPagination().paginate_queryset(
+            News.objects.all(), request,
+        )
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('page', (1, 2, DEEP_PAGE))
+def test_keyset_page(news_ids, page):
+    """Страница по курсору - один запрос без OFFSET с нужными новостями."""
+    request: Request = get_request(page)
+    with CaptureQueriesContext(connection) as context:
+        page_ids: list[int] = paginate(request)
+    assert len(context.captured_queries) == 1
+    assert 'OFFSET' not in context.captured_queries[0]['sql']
+    assert page_ids == news_ids[
+        (page - 1) * NEWS_PAGE_SIZE:page * NEWS_PAGE_SIZE
+    ]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_keyset_deep_page_benchmark(news_ids, best_time):
+    """Страница DEEP_PAGE выбирается не дольше первой (с запасом на шум)."""
+    first_request: Request = get_request(1)
+    deep_request: Request = get_request(DEEP_PAGE)
+    first: float = best_time(lambda: paginate(first_request), number=20)
+    deep: float = best_time(lambda: paginate(deep_request), number=20)
+    print(f'\nстраница 1: {first:.4f} с, страница {DEEP_PAGE}: {deep:.4f} с')
+    assert deep < first * 3
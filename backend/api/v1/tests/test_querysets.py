@@ -0,0 +1,96 @@
+import pytest
+
+from api.v1.querysets import get_last_comments
+from info.models import Appeal, News, NewsComment
+from urban_utopia_2024.app_data import NEWS_COMMENT_PREVIEW
+from user.models import User
+
+
+def create_appeals(count: int, citizen: User, municipal: User, address):
+    """
+    Создает count обращений без сигналов: половина - от citizen, остальные
+    - от разных пользователей с адресами.
+    """
+    users: list[User] = User.objects.bulk_create(
+        User(
+            email=f'user{i}@email.com',
+            username=f'user{i}',
+            phone=f'+7998{i:07d}',
+            first_name='Петр',
+            last_name='Петров',
+            address=address,
+        ) for i in range(count // 2)
+    )
+    Appeal.objects.bulk_create(
+        Appeal(
+            user=users[i // 2] if i % 2 else citizen,
+            municipal=municipal,
+            topic='Тема',
+            text=f'Обращение {i}',
+            address=address,
+        ) for i in range(count)
+    )
+    return
+
+
+# Запросов на список обращений: администратору - один запрос с
+# select_related, остальным ролям - быстрый путь (api.v1.fast_serializers):
+# строки обращений и по одному запросу на пользователей и адреса.
+APPEAL_LIST_QUERIES: dict[str, int] = {
+    'admin': 1,
+    'municipal': 3,
+    'citizen': 3,
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (1, 100, 10_000))
+@pytest.mark.parametrize('role', ('admin', 'municipal', 'citizen'))
+def test_appeal_list_num_queries(
+    request, api_client, django_assert_num_queries,
+    citizen, municipal, address, count, role,
+):
+    """Количество запросов списка обращений не зависит от их числа."""
+    create_appeals(
+        count=count,
+        citizen=citizen,
+        municipal=municipal,
+        address=address,
+    )
+    client = api_client(request.getfixturevalue(role))
+    with django_assert_num_queries(APPEAL_LIST_QUERIES[role]):
+        response = client.get('/api/v1/appeals/')
+    assert response.status_code == 200
+    assert len(response.json()) == (
+        count // 2 + count % 2 if role == 'citizen' else count
+    )
+
+
+@pytest.mark.django_db
+def test_last_comments(citizen, address, category):
+    """Из каждой новости выбираются только ее последние комментарии."""
+    news_list: list[News] = News.objects.bulk_create(
+        News(category=category, text=f'Новость {i}', address=address)
+        for i in range(4)
+    )
+    comments: list[NewsComment] = NewsComment.objects.bulk_create(
+        NewsComment(news=news, author=citizen, text=f'Комментарий {j}')
+        for i, news in enumerate(news_list)
+        for j in range(i * 2)
+    )
+    # INFO: pub_date комментариев пакета растет вместе с id.
+    expected: list[int] = sorted(
+        (
+            comment.id
+            for news in news_list[:-1]
+            for comment in [
+                comment for comment in comments if comment.news_id == news.id
+            ][-NEWS_COMMENT_PREVIEW:]
+        ),
+        reverse=True,
+    )
+    assert [
+        comment.id for comment in get_last_comments(
+            [news.id for news in news_list[:-1]],
+        )
+    ] == expected
@@ -0,0 +1,25 @@
+import pytest
+
+from info.models import Upload
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'filename, status_code',
+    (
+        ('photo.png', 201),
+        ('photo.JPG', 201),
+        ('photo.html', 400),
+        ('photo.svg', 400),
+        ('photo', 400),
+    ),
+)
+def test_upload_filename(api_client, municipal, filename, status_code):
+    """Загрузка создается только с расширением изображения."""
+    response = api_client(municipal).post(
+        '/api/v1/uploads/',
+        {'filename': filename, 'size': 1024},
+        format='json',
+    )
+    assert response.status_code == status_code
+    assert Upload.objects.exists() == (status_code == 201)
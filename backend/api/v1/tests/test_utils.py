@@ -0,0 +1,172 @@
+from io import StringIO
+import socketserver
+import threading
+
+from django.core import mail
+from django.core.management import call_command
+import pytest
+
+from api.v1 import utils
+from api.v1.tests.conftest import ADDRESS_DATA
+from api.v1.utils import (
+    close_mail_connection, resolve_address, send_mail_messages,
+)
+from user.models import Address
+
+# Ответы почтового сервера SMTPSinkHandler на команды, кроме "250 ok".
+SMTP_REPLIES: dict[bytes, bytes] = {
+    b'DATA': b'354 go',
+    b'QUIT': b'221 bye',
+}
+
+
+@pytest.mark.django_db
+def test_resolve_address_deleted(django_capture_on_commit_callbacks):
+    """Удаленный адрес не возвращается из кэшей."""
+    with django_capture_on_commit_callbacks(execute=True):
+        address_id: int = resolve_address(ADDRESS_DATA)
+    with django_capture_on_commit_callbacks(execute=True):
+        Address.objects.filter(id=address_id).delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        new_address_id: int = resolve_address(ADDRESS_DATA)
+    assert new_address_id != address_id
+    assert Address.objects.filter(id=new_address_id).exists()
+
+
+@pytest.mark.django_db
+def test_resolve_address_edited(django_capture_on_commit_callbacks):
+    """Прежний ключ измененного адреса больше не ведет к нему."""
+    with django_capture_on_commit_callbacks(execute=True):
+        address: Address = Address.objects.get(
+            id=resolve_address(ADDRESS_DATA),
+        )
+    with django_capture_on_commit_callbacks(execute=True):
+        address.apartment += 1
+        address.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert resolve_address(ADDRESS_DATA) != address.id
+        assert resolve_address(
+            {**ADDRESS_DATA, 'apartment': address.apartment},
+        ) == address.id
+
+
+@pytest.mark.django_db
+def test_resolve_address_version_cached(
+    monkeypatch, django_capture_on_commit_callbacks,
+):
+    """Адрес из кэша процесса читается без обращений к общему кэшу."""
+    with django_capture_on_commit_callbacks(execute=True):
+        address_id: int = resolve_address(ADDRESS_DATA)
+    calls: list[str] = []
+    get = utils.cache.get
+    monkeypatch.setattr(
+        utils.cache,
+        'get',
+        lambda key, *args, **kwargs: calls.append(key) or get(
+            key, *args, **kwargs
+        ),
+    )
+    assert resolve_address(ADDRESS_DATA) == address_id
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_backfill_address_keys():
+    """Ключ получает первый из адресов, различающихся только написанием."""
+    addresses: list[Address] = Address.objects.bulk_create(
+        (
+            Address(**ADDRESS_DATA),
+            Address(**{**ADDRESS_DATA, 'street': ' ЛЕНИНА '}),
+        )
+    )
+    call_command('backfill_address_keys', stdout=StringIO())
+    assert list(
+        Address.objects.order_by('id').values_list('key', flat=True)
+    ) == [Address.make_key(**ADDRESS_DATA), None]
+    assert resolve_address(
+        {**ADDRESS_DATA, 'street': 'ленина'},
+    ) == addresses[0].id
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Почтовый сервер, принимающий и отбрасывающий письма."""
+
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 sink\r\n')
+        for line in self.rfile:
+            command: bytes = line[:4].upper()
+            self.wfile.write(SMTP_REPLIES.get(command, b'250 ok') + b'\r\n')
+            if command == b'QUIT':
+                return
+            if command == b'DATA':
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                self.server.messages += 1
+                self.wfile.write(b'250 queued\r\n')
+
+
+@pytest.fixture
+def smtp_sink(monkeypatch, settings) -> socketserver.ThreadingTCPServer:
+    """Локальный почтовый сервер для рассылок get_mail_connection."""
+    server: socketserver.ThreadingTCPServer = (
+        socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPSinkHandler)
+    )
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+    settings.EMAIL_USE_TLS = settings.EMAIL_USE_SSL = False
+    settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ''
+    monkeypatch.setattr(utils, '_mail_connection', None)
+    yield server
+    close_mail_connection()
+    server.shutdown()
+    server.server_close()
+
+
+def send_chunks(chunks: int, size: int) -> None:
+    for chunk in range(chunks):
+        send_mail_messages(
+            subject='Тема',
+            messages=[
+                (f'user{chunk}_{i}@email.com', 'Текст') for i in range(size)
+            ],
+        )
+    return
+
+
+def test_mail_connection_reused(smtp_sink):
+    """Письма всех пачек уходят через одно соединение с сервером."""
+    send_chunks(chunks=3, size=5)
+    assert smtp_sink.messages == 15
+    assert smtp_sink.connections == 1
+
+
+@pytest.mark.benchmark
+def test_mail_connection_benchmark(smtp_sink, best_time):
+    """Общее соединение быстрее нового соединения на каждую пачку."""
+
+    def reused():
+        send_chunks(chunks=50, size=2)
+
+    def new_connection():
+        for chunk in range(50):
+            with mail.get_connection() as connection:
+                connection.send_messages(
+                    [
+                        mail.EmailMessage(
+                            subject='Тема',
+                            body='Текст',
+                            to=(f'user{chunk}_{i}@email.com',),
+                        ) for i in range(2)
+                    ]
+                )
+
+    reused_time: float = best_time(reused)
+    new_time: float = best_time(new_connection)
+    print(f'\nобщее: {reused_time:.4f} с, новое: {new_time:.4f} с')
+    assert reused_time < new_time
@@ -0,0 +1,33 @@
+import pytest
+import redis
+
+from api.v1 import utils
+from info.models import Answer, News, Quiz
+
+
+@pytest.mark.django_db
+def test_vote_without_redis(
+    monkeypatch, api_client, django_capture_on_commit_callbacks,
+    citizen, address, category,
+):
+    """При недоступном Redis голос учитывается сразу в БД."""
+    monkeypatch.setattr(
+        utils, '_redis_client', redis.Redis(port=1, socket_timeout=1),
+    )
+    quiz: Quiz = Quiz.objects.create(title='Опрос')
+    answer: Answer = Answer.objects.create(quiz=quiz, text='Да')
+    news: News = News.objects.create(
+        category=category,
+        text='Новость',
+        address=address,
+        quiz=quiz,
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client(citizen).post(
+            f'/api/v1/news/{news.id}/vote/',
+            {'answer': answer.id},
+            format='json',
+        )
+    assert response.status_code == 201
+    answer.refresh_from_db()
+    assert answer.vote_count == 1
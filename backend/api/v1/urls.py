@@ -7,7 +7,8 @@ from api.v1.serializers import CustomTokenObtainPairSerializer
 from api.v1.views import (
     AppealViewSet,
     CustomAuthToken, CustomTokenObtainPairView, CustomTokenRefreshView,
-    NewsViewSet, UserViewSet,
+    MailingViewSet, NewsViewSet, SubscriptionViewSet, UploadViewSet,
+    UserViewSet,
 )
 from urban_utopia_2024.app_data import AUTH_TOKEN, AUTH_JWT
 from urban_utopia_2024.settings import AUTH_TYPE
@@ -16,7 +17,10 @@ router: DefaultRouter = DefaultRouter()
 
 ROUTER_DATA: list[dict[str, ModelViewSet]] = [
     {'prefix': 'appeals', 'viewset': AppealViewSet},
+    {'prefix': 'mailings', 'viewset': MailingViewSet},
     {'prefix': 'news', 'viewset': NewsViewSet},
+    {'prefix': 'subscriptions', 'viewset': SubscriptionViewSet},
+    {'prefix': 'uploads', 'viewset': UploadViewSet},
     {'prefix': 'users', 'viewset': UserViewSet},
 ]
 
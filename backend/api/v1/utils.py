@@ -1,12 +1,246 @@
+from collections import OrderedDict
+import csv
+from datetime import datetime
 import hashlib
 import random
+import smtplib
 import string
+import threading
+import time
+from typing import Iterable, Iterator
 
 from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+from django.db import transaction
+from django.utils import timezone
+import redis
 
+from api.v1.renderers import ORJSONRenderer
 from urban_utopia_2024.app_data import (
-    DEFAULT_FROM_EMAIL, PASS_ITERATIONS, SECRET_SALT, USER_PASS_RAND_CYCLES,
+    ADDRESS_KEY_CACHE_PREFIX, ADDRESS_KEY_CACHE_SIZE,
+    ADDRESS_KEY_CACHE_TIMEOUT, ADDRESS_KEY_CACHE_VERSION_KEY,
+    ADDRESS_KEY_VERSION_TTL,
+    DEFAULT_FROM_EMAIL, MAIL_CONNECTION_CHECK_INTERVAL, PASS_ITERATIONS,
+    REDIS_COUNTERS_URL, SECRET_SALT, USER_PASS_RAND_CYCLES,
 )
+from user.models import Address
+
+
+class LRUCache:
+    """Потокобезопасный кэш процесса с вытеснением давно не читаемых."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize: int = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return
+
+
+_address_ids: LRUCache = LRUCache(maxsize=ADDRESS_KEY_CACHE_SIZE)
+_address_version: int = 0
+_address_version_checked: float = None
+_mail_connection: BaseEmailBackend = None
+_mail_connection_used: float = 0.0
+_redis_client: redis.Redis = None
+
+
+def bump_cache_version(key: str) -> None:
+    """
+    Обновляет версию кэша с ключом key.
+
+    Версия - отметка времени последней записи в наносекундах: все
+    записи кэша, построенные на предыдущей версии, больше не читаются.
+    """
+    cache.set(key, time.time_ns(), timeout=None)
+    return
+
+
+def bump_cache_versions_on_commit(*keys: str) -> None:
+    """
+    Обновляет версии кэшей keys после фиксации текущей транзакции (вне
+    транзакции - сразу).
+
+    Обработчики info.signals вызывают ее при записи моделей, а записи
+    без сигналов (QuerySet.update, bulk_create) - в месте самой записи.
+    """
+
+    def bump():
+        for key in keys:
+            bump_cache_version(key=key)
+
+    transaction.on_commit(bump)
+    return
+
+
+def resolve_address(address_data: dict) -> int:
+    """
+    Возвращает id адреса address_data, создавая адрес при отсутствии.
+
+    Адрес ищется по нормализованному ключу Address.key: сначала в кэше
+    процесса, затем в Redis, затем одним запросом по индексу. Новые
+    адреса вставляются с игнорированием конфликта уникальности, поэтому
+    параллельные запросы с одним адресом не падают с IntegrityError.
+    Кэши заполняются только после фиксации транзакции.
+
+    Записи обоих кэшей привязаны к версии ADDRESS_KEY_CACHE_VERSION_KEY,
+    которая меняется при изменении и удалении адресов: после этого
+    прежние записи не читаются процессом, в котором адрес изменен,
+    сразу, а остальными - в пределах ADDRESS_KEY_VERSION_TTL.
+    """
+    key: str = Address.make_key(**address_data)
+    versioned_key: str = f'{_get_address_version()}:{key}'
+    address_id: int = _address_ids.get(versioned_key)
+    if address_id is not None:
+        return address_id
+    cache_key: str = f'{ADDRESS_KEY_CACHE_PREFIX}:{versioned_key}'
+    address_id: int = cache.get(cache_key)
+    if address_id is not None:
+        _address_ids.set(versioned_key, address_id)
+        return address_id
+    address_id: int = _upsert_address(key=key, address_data=address_data)
+
+    def remember():
+        cache.set(cache_key, address_id, timeout=ADDRESS_KEY_CACHE_TIMEOUT)
+        _address_ids.set(versioned_key, address_id)
+
+    transaction.on_commit(remember)
+    return address_id
+
+
+def reset_address_keys() -> None:
+    """
+    Обновляет версию кэшей ключей адресов; процесс, из которого она
+    вызвана, перечитывает версию при следующем resolve_address.
+    """
+    global _address_version_checked
+    bump_cache_version(key=ADDRESS_KEY_CACHE_VERSION_KEY)
+    _address_version_checked = None
+    return
+
+
+def _get_address_version() -> int:
+    global _address_version, _address_version_checked
+    now: float = time.monotonic()
+    if (
+        _address_version_checked is None
+        or now - _address_version_checked > ADDRESS_KEY_VERSION_TTL
+    ):
+        _address_version = cache.get(ADDRESS_KEY_CACHE_VERSION_KEY, 0)
+        _address_version_checked = now
+    return _address_version
+
+
+def _upsert_address(key: str, address_data: dict) -> int:
+    # INFO: ключи адресов, созданных до появления Address.key, заполняет
+    #       команда backfill_address_keys.
+    addresses = Address.objects.filter(key=key).values_list('id', flat=True)
+    address_id: int = addresses.first()
+    if address_id is not None:
+        return address_id
+    Address.objects.bulk_create(
+        (Address(key=key, **address_data),),
+        ignore_conflicts=True,
+    )
+    return addresses.get()
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_csv(header: tuple[str], rows: Iterable[tuple]) -> Iterator[str]:
+    """Построчно формирует CSV из заголовка header и строк rows."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(_export_row(row))
+
+
+def export_ndjson(
+    header: tuple[str], rows: Iterable[tuple]
+) -> Iterator[bytes]:
+    """Построчно формирует NDJSON: объект {header: значение} на строку."""
+    renderer: ORJSONRenderer = ORJSONRenderer()
+    for row in rows:
+        yield renderer.render(dict(zip(header, _export_row(row)))) + b'\n'
+
+
+def close_mail_connection() -> None:
+    """Закрывает соединение процесса с почтовым сервером."""
+    if _mail_connection is not None:
+        _mail_connection.close()
+    return
+
+
+def get_mail_connection() -> BaseEmailBackend:
+    """
+    Возвращает соединение процесса с почтовым сервером для рассылок.
+
+    SMTP-соединение открывается один раз и переиспользуется задачами
+    рабочего процесса Celery: после простоя дольше
+    MAIL_CONNECTION_CHECK_INTERVAL оно проверяется командой NOOP и при
+    разрыве открывается заново. Остальные бекенды открываются на каждую
+    отправку.
+    """
+    global _mail_connection, _mail_connection_used
+    if _mail_connection is None:
+        _mail_connection = mail.get_connection(
+            backend=None,
+            fail_silently=False,
+        )
+    if not isinstance(_mail_connection, SMTPEmailBackend):
+        return _mail_connection
+    idle: float = time.monotonic() - _mail_connection_used
+    if (
+        _mail_connection.connection is not None
+        and idle > MAIL_CONNECTION_CHECK_INTERVAL
+    ):
+        try:
+            alive: bool = _mail_connection.connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            alive: bool = False
+        if not alive:
+            _mail_connection.close()
+    _mail_connection.open()
+    _mail_connection_used = time.monotonic()
+    return _mail_connection
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Возвращает клиент базы Redis для счетчиков (REDIS_COUNTERS_URL).
+
+    Клиент создается один раз на процесс и использует общий пул
+    соединений.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_COUNTERS_URL)
+    return _redis_client
+
+
+def get_cache_version(key: str) -> int:
+    """Возвращает текущую версию кэша с ключом key."""
+    return cache.get_or_set(key, time.time_ns, timeout=None)
 
 
 def create_secret_code(email: str) -> str:
@@ -23,6 +257,17 @@ def create_secret_code(email: str) -> str:
     return ''.join(pass_chars)
 
 
+def parse_query_list(request, name: str) -> set[str]:
+    """
+    Возвращает множество значений параметра запроса name, перечисленных
+    через запятую, или None, если параметр не передан.
+    """
+    value: str = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
 def send_mail(subject: str, message: str, to: tuple[str]) -> None:
     """
     Отправляет электронное сообщение списку пользователей в to.
@@ -40,3 +285,39 @@ def send_mail(subject: str, message: str, to: tuple[str]) -> None:
             connection=conn
         ).send(fail_silently=False)
     return
+
+
+def send_mail_messages(
+    subject: str,
+    messages: Iterable[tuple[str, str]],
+) -> int:
+    """
+    Отправляет письма с темой subject по парам (адресат, текст) из
+    messages через одно соединение get_mail_connection.
+
+    При ошибке отправки соединение закрывается, и следующая рассылка
+    открывает новое. Возвращает количество отправленных писем.
+    """
+    connection: BaseEmailBackend = get_mail_connection()
+    messages: list[mail.EmailMessage] = [
+        mail.EmailMessage(
+            subject=subject,
+            body=message,
+            from_email=DEFAULT_FROM_EMAIL,
+            to=(email,),
+        ) for email, message in messages
+    ]
+    try:
+        return connection.send_messages(messages)
+    except (smtplib.SMTPException, OSError):
+        close_mail_connection()
+        raise
+
+
+def _export_row(row: tuple) -> list:
+    """Приводит дату и время строки выгрузки к местному времени ISO 8601."""
+    return [
+        timezone.localtime(value).isoformat()
+        if isinstance(value, datetime) else value
+        for value in row
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.auth import authenticate
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import serializers, status
@@ -12,27 +14,55 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView, TokenRefreshView,
 )
 
+from api.v1.fast_serializers import (
+    appeal_values, news_values,
+    serialize_appeals_municipal, serialize_appeals_user, serialize_news,
+)
+from api.v1.mixins import (
+    CachedResponseMixin, ConditionalGetMixin, FastListMixin,
+    SparseFieldsetMixin,
+)
+from api.v1.paginations import KeysetPagination
 from api.v1.permissions import IsMunicipal
+from api.v1.querysets import (
+    USER_PLAN, apply_plan, get_appeal_queryset, get_news_queryset,
+)
 from api.v1.serializers import (
-    AppealAdminSerializer, AppealAnswerSerializer, AppealMunicipalSerializer,
+    AppealAdminSerializer, AppealAnswerSerializer, AppealExportSerializer,
+    AppealMunicipalSerializer,
+    AnswerVoteSerializer,
     AppealRatingSerializer, AppealUserSerializer, AppealUserPostSerializer,
-    EmailConfirmSerializer, MunicipalSerializer,
-    NewsSerializer, NewsCommentSerializer, NewsPostSerializer,
+    EmailConfirmSerializer, MailingSerializer, MunicipalSerializer,
+    NewsSerializer, NewsCommentSerializer, NewsCommentFullSerializer,
+    NewsBatchPostSerializer, NewsDigestSerializer, NewsPostSerializer,
+    SubscriptionSerializer,
+    UploadChunkSerializer, UploadSerializer,
     UserFullSerializer, UserRegisterSerializer, UserShortSerializer,
 )
 from api.v1.schemas_views import (
-    APPEAL_SCHEMA, DEFAULT_400_REQUIRED, NEWS_SCHEMA,
-    TOKEN_JWT_OBTAIN_SCHEMA, TOKEN_JWT_REFRESH_SCHEMA, USERS_SCHEMA,
+    APPEAL_SCHEMA, DEFAULT_400_REQUIRED, MAILING_SCHEMA, NEWS_SCHEMA,
+    SUBSCRIPTION_SCHEMA, TOKEN_JWT_OBTAIN_SCHEMA, TOKEN_JWT_REFRESH_SCHEMA,
+    UPLOAD_SCHEMA, USERS_SCHEMA,
 )
-from api.v1.utils import create_secret_code, send_mail
-from info.models import Appeal, News, NewsComment
-from info.tasks import send_mass_mail_async
+from api.v1.utils import (
+    create_secret_code, export_csv, export_ndjson,
+)
+from info import appeal_states, outbox, uploads
+from info.models import (
+    Answer, Appeal, Mailing, News, NewsComment, Upload,
+)
+from info.tasks import send_mail_async, send_mass_mail_async
+from info.votes import record_vote
 from urban_utopia_2024.app_data import (
+    APPEAL_CACHE_VERSION_KEY,
+    APPEAL_EXPORT_CHUNK_SIZE, APPEAL_EXPORT_CSV, APPEAL_EXPORT_FIELDS,
     APPEAL_STAGE_COMPLETED, CITE_DOMAIN,
     EMAIL_CONFIRM_EMAIL_SUBJECT, EMAIL_CONFIRM_EMAIL_TEXT,
+    EMAIL_NEWS_BATCH_LINK, EMAIL_NEWS_BATCH_TEXT,
     EMAIL_NEWS_SUBJECT, EMAIL_NEWS_TEXT,
+    NEWS_CACHE_TIMEOUT, NEWS_CACHE_VERSION_KEY,
 )
-from user.models import User
+from user.models import Subscription, User
 
 
 class CustomAuthToken(ObtainAuthToken):
@@ -72,9 +102,12 @@ class CustomAuthToken(ObtainAuthToken):
 
 
 @extend_schema_view(**APPEAL_SCHEMA)
-class AppealViewSet(ModelViewSet):
+class AppealViewSet(
+    ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, ModelViewSet,
+):
     """ViewSet для взаимодействия с моделью обращений."""
 
+    conditional_version_key = APPEAL_CACHE_VERSION_KEY
     http_method_names = ('get', 'post',)
     permission_classes = (IsAuthenticated,)
 
@@ -87,12 +120,23 @@ class AppealViewSet(ModelViewSet):
             return AppealUserPostSerializer
         return AppealUserSerializer
 
+    def get_fast_list(self):
+        user: User = self.request.user
+        if user.is_staff:
+            return None
+        rows = appeal_values(
+            get_appeal_queryset(user=user, fields=set())
+        )
+        if user.is_municipal:
+            return rows, serialize_appeals_municipal
+        return rows, serialize_appeals_user
+
     def get_queryset(self):
-        if self.request.user.is_staff:
-            return Appeal.objects.all()
-        if self.request.user.is_municipal:
-            return Appeal.objects.filter(municipal=self.request.user)
-        return Appeal.objects.filter(user=self.request.user)
+        return get_appeal_queryset(
+            user=self.request.user,
+            fields=self.requested_fields,
+            expand=self.requested_expand,
+        )
 
     def create(self, request, *args, **kwargs):
         serializer: serializers = self.get_serializer(
@@ -109,6 +153,56 @@ class AppealViewSet(ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='export',
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request):
+        """
+        Выгрузить обращения в CSV или NDJSON.
+
+        Строки читаются из курсора БД порциями и сразу отдаются клиенту,
+        поэтому расход памяти не зависит от количества обращений.
+        """
+        serializer: serializers = AppealExportSerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
+        params: dict[str, any] = serializer.validated_data
+        filters: dict[str, any] = {}
+        for param, lookup in (
+            ('status', 'status'),
+            ('date_from', 'pub_date__gte'),
+            ('date_to', 'pub_date__lte'),
+            ('municipal', 'municipal_id'),
+        ):
+            if param in params:
+                filters[lookup] = params[param]
+        rows = Appeal.objects.filter(**filters).order_by(
+            'id'
+        ).values_list(
+            *APPEAL_EXPORT_FIELDS
+        ).iterator(
+            chunk_size=APPEAL_EXPORT_CHUNK_SIZE
+        )
+        file_format: str = params['file_format']
+        if file_format == APPEAL_EXPORT_CSV:
+            content = export_csv(header=APPEAL_EXPORT_FIELDS, rows=rows)
+            content_type: str = 'text/csv; charset=utf-8'
+        else:
+            content = export_ndjson(header=APPEAL_EXPORT_FIELDS, rows=rows)
+            content_type: str = 'application/x-ndjson'
+        response: StreamingHttpResponse = StreamingHttpResponse(
+            streaming_content=content,
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="appeals.{file_format}"'
+        )
+        return response
+
     @action(
         detail=True,
         methods=('post',),
@@ -117,12 +211,16 @@ class AppealViewSet(ModelViewSet):
     )
     def post_answer(self, request, pk):
         """Оставить ответ обращению."""
-        appeal: Appeal = get_object_or_404(
-            Appeal,
-            id=pk,
-            municipal=self.request.user,
+        serializer: serializers = AppealAnswerSerializer(
+            data=request.data
         )
-        if appeal.answer is not None:
+        serializer.is_valid(raise_exception=True)
+        appeals = Appeal.objects.filter(id=pk, municipal=self.request.user)
+        if not appeal_states.complete(
+            queryset=appeals,
+            answer=serializer.validated_data.get('answer'),
+        ):
+            get_object_or_404(appeals)
             return Response(
                 data={
                     'detail': (
@@ -131,12 +229,6 @@ class AppealViewSet(ModelViewSet):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        serializer: serializers = AppealAnswerSerializer(
-            data=request.data
-        )
-        serializer.is_valid(raise_exception=True)
-        appeal.answer: float = serializer.validated_data.get('answer')
-        appeal.status: str = APPEAL_STAGE_COMPLETED
         return Response(
             data={'answer': 'Ответ обращению оставлен.'},
             status=status.HTTP_200_OK,
@@ -150,24 +242,30 @@ class AppealViewSet(ModelViewSet):
     )
     def rate_answer(self, request, pk):
         """Оставить оценку ответу обращения."""
-        appeal: Appeal = get_object_or_404(
-            Appeal, id=pk, user=self.request.user
-        )
-        if appeal.status != APPEAL_STAGE_COMPLETED:
-            return Response(
-                data={
-                    'detail': (
-                        'Вы не можете поставить оценку '
-                        'незавершенному обращению.'
-                    )
-                },
-                status=status.HTTP_403_FORBIDDEN,
-            )
         serializer: serializers = AppealRatingSerializer(
             data=request.data
         )
         serializer.is_valid(raise_exception=True)
-        appeal.rating = serializer.validated_data.get('rating')
+        appeals = Appeal.objects.filter(id=pk, user=self.request.user)
+        if not appeal_states.rate(
+            queryset=appeals,
+            rating=serializer.validated_data.get('rating'),
+        ):
+            appeal: Appeal = get_object_or_404(appeals)
+            if appeal.status != APPEAL_STAGE_COMPLETED:
+                return Response(
+                    data={
+                        'detail': (
+                            'Вы не можете поставить оценку '
+                            'незавершенному обращению.'
+                        )
+                    },
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            return Response(
+                data={'detail': 'Вы уже оценили ответ обращению.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         return Response(
             data={'rating': 'Благодарим за оценку ответа!'},
             status=status.HTTP_200_OK,
@@ -187,53 +285,163 @@ class CustomTokenRefreshView(TokenRefreshView):
 
 
 @extend_schema_view(**NEWS_SCHEMA)
-class NewsViewSet(ModelViewSet):
+class NewsViewSet(
+    ConditionalGetMixin, CachedResponseMixin, FastListMixin,
+    SparseFieldsetMixin, ModelViewSet,
+):
     """ViewSet для взаимодействия с моделью новостей."""
 
+    cache_timeout = NEWS_CACHE_TIMEOUT
+    cache_version_key = NEWS_CACHE_VERSION_KEY
+    conditional_version_key = NEWS_CACHE_VERSION_KEY
     http_method_names = ('get', 'post',)
-    queryset = News.objects.select_related(
-        'category',
-        'address',
-        'quiz',
-    ).prefetch_related(
-        'picture',
-        'comment',
-    ).all()
+    pagination_class = KeysetPagination
+
+    def get_fast_list(self):
+        return news_values(get_news_queryset(fields=set())), serialize_news
+
+    def get_queryset(self):
+        return get_news_queryset(
+            fields=self.requested_fields,
+            expand=self.requested_expand,
+        )
 
     def get_permissions(self):
-        if self.action == 'add_comment':
+        if self.action in ('add_comment', 'vote'):
             self.permission_classes = [IsAuthenticated,]
         elif self.request.method == 'POST':
             self.permission_classes = [IsMunicipal,]
         return super().get_permissions()
 
     def get_serializer_class(self):
+        if self.action == 'batch':
+            return NewsBatchPostSerializer
         if self.request.method == 'POST':
             return NewsPostSerializer
         return NewsSerializer
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer: serializers = self.get_serializer(
             data=request.data,
             context={'municipal_id': request.user.id},
         )
         serializer.is_valid(raise_exception=True)
-        news_instance: News = serializer.save()
+        news_instance: News = get_news_queryset().get(
+            id=serializer.save().id,
+        )
         response_serializer: serializers = NewsSerializer(
-            instance=news_instance
+            instance=news_instance,
+            context=self.get_serializer_context(),
         )
-        send_mass_mail_async.delay(
+        mailing: Mailing = Mailing.objects.create(
+            municipal=request.user,
             subject=EMAIL_NEWS_SUBJECT,
             message=EMAIL_NEWS_TEXT.format(
                 category=news_instance.category,
                 link=f'https://{CITE_DOMAIN}/api/v1/news/{news_instance.id}/',
             ),
         )
+        # INFO: рассылка записывается в outbox в транзакции новости и
+        #       отправляется брокеру задачей info.tasks.relay_outbox.
+        outbox.enqueue(
+            send_mass_mail_async,
+            {
+                'mailing_id': mailing.id,
+                'category_id': news_instance.category_id,
+                'district': news_instance.address.district,
+                'emergency': news_instance.is_emergency,
+            },
+        )
+        return Response(
+            data=response_serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        methods=('post',),
+        detail=False,
+        url_path='batch',
+    )
+    @transaction.atomic
+    def batch(self, request):
+        """Опубликовать несколько новостей одним запросом."""
+        serializer: serializers = self.get_serializer(
+            data=request.data,
+            context={'municipal_id': request.user.id},
+        )
+        serializer.is_valid(raise_exception=True)
+        news_list: list[News] = list(
+            get_news_queryset().filter(
+                id__in=[news.id for news in serializer.save()],
+            ).order_by('id')
+        )
+        response_serializer: serializers = NewsSerializer(
+            instance=news_list,
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        # INFO: одно письмо на каждую группу (категория, район, экстренная)
+        #       пакета - у каждой группы свои получатели.
+        news_groups: dict[tuple[int, str, bool], list[News]] = {}
+        for news in news_list:
+            news_groups.setdefault(
+                (news.category_id, news.address.district, news.is_emergency),
+                [],
+            ).append(news)
+        mailings: list[Mailing] = Mailing.objects.bulk_create(
+            Mailing(
+                municipal=request.user,
+                subject=EMAIL_NEWS_SUBJECT,
+                message=EMAIL_NEWS_BATCH_TEXT.format(
+                    links='\n'.join(
+                        EMAIL_NEWS_BATCH_LINK.format(
+                            category=news.category,
+                            link=(
+                                f'https://{CITE_DOMAIN}/api/v1/news/'
+                                f'{news.id}/'
+                            ),
+                        ) for news in news_group
+                    ),
+                ),
+            ) for news_group in news_groups.values()
+        )
+        outbox.enqueue(
+            send_mass_mail_async,
+            *(
+                {
+                    'mailing_id': mailing.id,
+                    'category_id': category_id,
+                    'district': district,
+                    'emergency': emergency,
+                }
+                for mailing, (category_id, district, emergency) in zip(
+                    mailings, news_groups,
+                )
+            ),
+        )
         return Response(
             data=response_serializer.data,
             status=status.HTTP_201_CREATED
         )
 
+    @action(
+        methods=('get',),
+        detail=True,
+        url_path='comments',
+    )
+    def comments(self, request, pk):
+        """Получить комментарии к новости постранично."""
+        news: News = get_object_or_404(News, id=pk)
+        page: list[NewsComment] = self.paginate_queryset(
+            NewsComment.objects.select_related('author').filter(news=news)
+        )
+        serializer: serializers = NewsCommentFullSerializer(
+            instance=page,
+            many=True,
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(
         methods=('post',),
         detail=True,
@@ -255,9 +463,196 @@ class NewsViewSet(ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    @action(
+        methods=('post',),
+        detail=True,
+        url_path='vote',
+        permission_classes=(IsAuthenticated,),
+    )
+    def vote(self, request, pk):
+        """
+        Проголосовать в опросе новости.
+
+        Повторный голос за тот же ответ не учитывается и возвращает 200.
+        """
+        serializer: serializers = AnswerVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        answer: Answer = get_object_or_404(
+            Answer,
+            id=serializer.validated_data.get('answer'),
+            quiz__news__id=pk,
+        )
+        if record_vote(answer_id=answer.id, user_id=request.user.id):
+            return Response(
+                data={'vote': 'Ваш голос учтен!'},
+                status=status.HTTP_201_CREATED,
+            )
+        return Response(
+            data={'vote': 'Вы уже голосовали за этот ответ.'},
+            status=status.HTTP_200_OK,
+        )
+
+
+@extend_schema_view(**MAILING_SCHEMA)
+class MailingViewSet(ModelViewSet):
+    """
+    ViewSet хода рассылок писем о новостях муниципальной службы.
+
+    Счетчики рассылки обновляются задачами отправки по мере отметки
+    получателей (info.mailing.mark_recipients).
+    """
+
+    http_method_names = ('get',)
+    permission_classes = (IsMunicipal,)
+    serializer_class = MailingSerializer
+
+    def get_queryset(self):
+        return Mailing.objects.filter(municipal=self.request.user)
+
+
+@extend_schema_view(**SUBSCRIPTION_SCHEMA)
+class SubscriptionViewSet(ModelViewSet):
+    """
+    ViewSet подписок пользователя на новости категорий услуг.
+
+    Письма о новостях получают только подписчики категории новости
+    (во всех районах или в районе адреса новости).
+    """
+
+    http_method_names = ('get', 'post', 'delete',)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = SubscriptionSerializer
+
+    def get_queryset(self):
+        return Subscription.objects.select_related('category').filter(
+            user=self.request.user,
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+@extend_schema_view(**UPLOAD_SCHEMA)
+class UploadViewSet(ModelViewSet):
+    """
+    ViewSet загрузки картинок новостей частями.
+
+    Загрузка создается с именем и размером файла, затем файл передается
+    частями не больше UPLOAD_CHUNK_MAX_SIZE байт в теле запросов
+    /chunk/?offset=N. При обрыве клиент запрашивает загрузку и продолжает
+    с ее offset. Завершенная загрузка (/commit/) указывается в поле
+    uploads при публикации новости.
+    """
+
+    http_method_names = ('get', 'post',)
+    permission_classes = (IsMunicipal,)
+    serializer_class = UploadSerializer
+
+    def get_queryset(self):
+        return Upload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(
+        methods=('post',),
+        detail=True,
+        url_path='chunk',
+    )
+    def chunk(self, request, pk):
+        """
+        Записать часть файла загрузки.
+
+        Тело запроса - байты файла начиная со смещения offset, которое
+        должно совпадать с текущим offset загрузки, иначе возвращается
+        409 с текущим смещением.
+        """
+        upload: Upload = self.get_object()
+        serializer: serializers = UploadChunkSerializer(
+            data={
+                'offset': request.query_params.get('offset'),
+                'length': request.META.get('CONTENT_LENGTH') or 0,
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        offset: int = serializer.validated_data.get('offset')
+        length: int = serializer.validated_data.get('length')
+        if upload.committed:
+            return Response(
+                data={'detail': 'Загрузка уже завершена.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if offset != upload.offset:
+            return Response(
+                data={'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if offset + length > upload.size:
+            return Response(
+                data={'detail': 'Часть выходит за размер файла.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        new_offset: int = uploads.write_chunk(
+            upload_id=upload.id,
+            offset=offset,
+            stream=request.stream,
+            length=length,
+        )
+        # INFO: смещение сдвигается только с прежнего значения, поэтому
+        #       из параллельных запросов с одним offset засчитывается один.
+        if not Upload.objects.filter(
+            id=upload.id,
+            offset=offset,
+            committed=False,
+        ).update(offset=new_offset):
+            upload.refresh_from_db(fields=('offset',))
+            return Response(
+                data={'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            data={'offset': new_offset},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        methods=('post',),
+        detail=True,
+        url_path='commit',
+    )
+    def commit(self, request, pk):
+        """
+        Завершить загрузку.
+
+        Файл должен быть получен полностью и быть изображением, иначе
+        загрузка удаляется.
+        """
+        upload: Upload = self.get_object()
+        if upload.offset != upload.size:
+            return Response(
+                data={
+                    'detail': 'Файл получен не полностью.',
+                    'offset': upload.offset,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not upload.committed:
+            if not uploads.is_image(upload_id=upload.id):
+                uploads.delete_uploads(upload_ids=(upload.id,))
+                return Response(
+                    data={'detail': 'Загруженный файл не изображение.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            Upload.objects.filter(id=upload.id).update(committed=True)
+            upload.committed = True
+        return Response(
+            data=self.get_serializer(instance=upload).data,
+            status=status.HTTP_200_OK,
+        )
+
 
 @extend_schema_view(**USERS_SCHEMA)
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, ModelViewSet):
     """ViewSet для взаимодействия с моделью User."""
 
     http_method_names = ('get', 'post',)
@@ -269,7 +664,7 @@ class UserViewSet(ModelViewSet):
         return UserFullSerializer
 
     def get_permissions(self):
-        if self.action == 'me':
+        if self.action in ('me', 'news_digest'):
             self.permission_classes = [IsAuthenticated,]
         elif self.request.method == 'GET':
             self.permission_classes = [IsAdminUser,]
@@ -277,18 +672,14 @@ class UserViewSet(ModelViewSet):
 
     def get_queryset(self):
         is_municipal: str = self.request.query_params.get('is_municipal')
-        if is_municipal == 'true':
-            return User.objects.select_related(
-                'address',
-            ).filter(
+        return apply_plan(
+            queryset=User.objects.filter(
                 is_staff=False,
-                is_municipal=True,
-            )
-        return User.objects.select_related(
-            'address',
-        ).filter(
-            is_staff=False,
-            is_municipal=False,
+                is_municipal=is_municipal == 'true',
+            ),
+            plan=USER_PLAN,
+            fields=self.requested_fields,
+            expand=self.requested_expand,
         )
 
     @action(
@@ -302,7 +693,7 @@ class UserViewSet(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         email: str = serializer.validated_data.get('email')
         secret_code: str = create_secret_code(email=email)
-        send_mail(
+        send_mail_async.delay(
             subject=EMAIL_CONFIRM_EMAIL_SUBJECT,
             message=EMAIL_CONFIRM_EMAIL_TEXT.format(
                 secret_code=secret_code,
@@ -313,6 +704,27 @@ class UserViewSet(ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        methods=('post',),
+        detail=False,
+        url_path='news_digest',
+    )
+    def news_digest(self, request):
+        """
+        Выбрать режим писем о новостях подписок: сразу после публикации
+        или дайджестом раз в час/день.
+        """
+        serializer: serializers = NewsDigestSerializer(
+            instance=request.user,
+            data=request.data,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(
+            data=serializer.data,
+            status=status.HTTP_200_OK,
+        )
+
     @action(
         methods=('get',),
         detail=False,
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
+from info import appeal_states
 from info.models import (
-    Answer, AnswerUser, Appeal,
+    Answer, AnswerUser, Appeal, Mailing,
     News, NewsComment, NewsPicture,
     Task, Quiz,
 )
@@ -112,6 +113,9 @@ class AppealAdmin(admin.ModelAdmin):
             - дата и время обращения (pub_date)
             - текст ответа на обращение (answer)
         - list_per_page (int) - количество объектов на одной странице
+        - actions (tuple) - массовые переходы статуса (info.appeal_states):
+            - взять в работу (take_in_progress)
+            - отклонить (reject)
     """
     list_display = (
         'id',
@@ -149,6 +153,60 @@ class AppealAdmin(admin.ModelAdmin):
         'answer',
     )
     list_per_page = ADMIN_LIST_PER_PAGE
+    actions = (
+        'take_in_progress',
+        'reject',
+    )
+
+    @admin.action(description='Взять в работу')
+    def take_in_progress(self, request, queryset):
+        updated: int = appeal_states.take_in_progress(queryset=queryset)
+        self.message_user(request, f'Взято в работу обращений: {updated}.')
+
+    @admin.action(description='Отклонить')
+    def reject(self, request, queryset):
+        updated: int = appeal_states.reject(queryset=queryset)
+        self.message_user(request, f'Отклонено обращений: {updated}.')
+
+
+@admin.register(Mailing)
+class MailingAdmin(admin.ModelAdmin):
+    """
+    Переопределяет административный интерфейс Django для модели Mailing.
+
+    Атрибуты:
+        - list_display (tuple) - список полей для отображения в интерфейсе:
+            - ID рассылки (id)
+            - муниципальная служба (municipal)
+            - тема (subject)
+            - количество получателей (total)
+            - количество отправленных писем (sent)
+            - количество недоставленных писем (failed)
+            - дата и время создания (pub_date)
+        - list_filter (tuple) - список фильтров:
+            - муниципальная служба (municipal)
+        - list_per_page (int) - количество объектов на одной странице
+        - readonly_fields (tuple) - поля только для чтения:
+            - счетчики рассылки (total, sent, failed)
+    """
+    list_display = (
+        'id',
+        'municipal',
+        'subject',
+        'total',
+        'sent',
+        'failed',
+        'pub_date',
+    )
+    list_filter = (
+        'municipal',
+    )
+    list_per_page = ADMIN_LIST_PER_PAGE
+    readonly_fields = (
+        'total',
+        'sent',
+        'failed',
+    )
 
 
 @admin.register(News)
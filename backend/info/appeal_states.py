@@ -0,0 +1,121 @@
+"""
+Машина состояний обращений граждан.
+
+Допустимые переходы статуса (APPEAL_STATUS_CHOICES):
+    - initial -> in_progress, completed, rejected
+    - in_progress -> completed, rejected
+    - completed, rejected - конечные
+
+Каждый переход выполняется одним условным запросом
+UPDATE ... WHERE status IN (<ожидаемые>) по переданной выборке и
+возвращает количество измененных обращений: 0 означает, что обращения
+нет в выборке или его статус уже изменен другим запросом. Поэтому
+переходы не требуют предварительного чтения, не подвержены гонкам и
+применимы к любому количеству обращений сразу.
+"""
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from api.v1.utils import bump_cache_versions_on_commit
+from info import ratings
+from urban_utopia_2024.app_data import (
+    APPEAL_CACHE_VERSION_KEY, APPEAL_STAGE_COMPLETED, APPEAL_STAGE_INITIAL,
+    APPEAL_STAGE_IN_PROGRESS, APPEAL_STAGE_REJECTED,
+)
+
+APPEAL_TRANSITIONS: dict[str, tuple[str]] = {
+    APPEAL_STAGE_INITIAL: (
+        APPEAL_STAGE_IN_PROGRESS,
+        APPEAL_STAGE_COMPLETED,
+        APPEAL_STAGE_REJECTED,
+    ),
+    APPEAL_STAGE_IN_PROGRESS: (
+        APPEAL_STAGE_COMPLETED,
+        APPEAL_STAGE_REJECTED,
+    ),
+    APPEAL_STAGE_COMPLETED: (),
+    APPEAL_STAGE_REJECTED: (),
+}
+
+
+def transition(queryset: QuerySet, target: str, **values) -> int:
+    """
+    Переводит обращения выборки queryset в статус target.
+
+    Изменяются только обращения, из статуса которых переход в target
+    допустим; values - дополнительные поля, записываемые тем же UPDATE.
+    """
+    sources: list[str] = [
+        source for source, targets in APPEAL_TRANSITIONS.items()
+        if target in targets
+    ]
+    if not sources:
+        raise ValueError(f'Недопустимый статус обращения: {target}.')
+    return _update(
+        queryset=queryset.filter(status__in=sources),
+        status=target,
+        **values,
+    )
+
+
+def take_in_progress(queryset: QuerySet) -> int:
+    """Берет обращения в работу."""
+    return transition(queryset=queryset, target=APPEAL_STAGE_IN_PROGRESS)
+
+
+def complete(queryset: QuerySet, answer: str) -> int:
+    """Завершает обращения официальным ответом answer."""
+    return transition(
+        queryset=queryset,
+        target=APPEAL_STAGE_COMPLETED,
+        answer=answer,
+    )
+
+
+def reject(queryset: QuerySet, answer: str = None) -> int:
+    """Отклоняет обращения, при наличии - с ответом answer."""
+    values: dict[str, str] = {}
+    if answer is not None:
+        values['answer'] = answer
+    return transition(
+        queryset=queryset,
+        target=APPEAL_STAGE_REJECTED,
+        **values,
+    )
+
+
+@transaction.atomic
+def rate(queryset: QuerySet, rating: int) -> int:
+    """
+    Ставит оценку rating завершенным, еще не оцененным обращениям.
+
+    Оценка добавляется к рейтингу муниципальных служб в той же
+    транзакции (info.ratings.add_ratings).
+    """
+    appeals: list[tuple[int, int]] = list(
+        queryset.select_for_update().filter(
+            status=APPEAL_STAGE_COMPLETED,
+            rating__isnull=True,
+        ).values_list('id', 'municipal_id')
+    )
+    if not appeals:
+        return 0
+    updated: int = _update(
+        queryset=queryset.model.objects.filter(
+            id__in=[appeal_id for appeal_id, _ in appeals],
+        ),
+        rating=rating,
+    )
+    ratings.add_ratings(
+        municipal_ids=[municipal_id for _, municipal_id in appeals],
+        rating=rating,
+    )
+    return updated
+
+
+def _update(queryset: QuerySet, **values) -> int:
+    updated: int = queryset.update(**values)
+    if updated:
+        bump_cache_versions_on_commit(APPEAL_CACHE_VERSION_KEY)
+    return updated
@@ -5,3 +5,6 @@ class InfoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'info'
     verbose_name = 'Информация'
+
+    def ready(self):
+        import info.signals  # noqa (F401)
@@ -0,0 +1,82 @@
+"""
+Уменьшенные копии загруженных изображений.
+
+Для картинок новостей (NewsPicture.picture) и фотографий пользователей
+(User.photo) задача info.tasks.make_image_variants создает копии из
+IMAGE_VARIANTS рядом с оригиналом и записывает их в поле
+<поле>_variants модели:
+    {'source': <оригинал>, 'thumbnail': <копия>, 'medium': ..., ...}
+
+Копии актуальны, пока source совпадает с текущим файлом поля.
+"""
+
+from io import BytesIO
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from urban_utopia_2024.app_data import IMAGE_VARIANT_QUALITY, IMAGE_VARIANTS
+
+# Модели с изображениями и их поля; копии хранятся в <поле>_variants.
+IMAGE_FIELDS: dict[str, str] = {
+    'info.NewsPicture': 'picture',
+    'user.User': 'photo',
+}
+
+
+def get_variants(variants: dict[str, str], name: str) -> dict[str, str]:
+    """Возвращает копии изображения name или None, если их еще нет."""
+    if not name or not variants or variants.get('source') != name:
+        return None
+    return {
+        variant: variants[variant] for variant in IMAGE_VARIANTS
+        if variant in variants
+    }
+
+
+def make_variants(name: str) -> dict[str, str]:
+    """
+    Создает копии изображения name из хранилища и возвращает их имена.
+
+    JPEG декодируется сразу в уменьшенном масштабе, не меньше наибольшей
+    копии, а копии строятся от большей к меньшей, каждая - из
+    предыдущей, а не из оригинала.
+    """
+    order: list[str] = sorted(
+        IMAGE_VARIANTS,
+        key=lambda variant: IMAGE_VARIANTS[variant][0],
+        reverse=True,
+    )
+    largest: int = IMAGE_VARIANTS[order[0]][0]
+    with default_storage.open(name) as file:
+        image: Image.Image = Image.open(file)
+        source_format: str = image.format or 'JPEG'
+        image.draft(image.mode, (largest, largest))
+        image: Image.Image = ImageOps.exif_transpose(image)
+        image.load()
+    root, ext = os.path.splitext(name)
+    variants: dict[str, str] = {'source': name}
+    for variant in order:
+        size, image_format = IMAGE_VARIANTS[variant]
+        image_format: str = image_format or source_format
+        image.thumbnail((size, size))
+        output: Image.Image = image
+        if image_format == 'JPEG' and output.mode not in ('RGB', 'L'):
+            output: Image.Image = output.convert('RGB')
+        buffer: BytesIO = BytesIO()
+        output.save(
+            buffer,
+            format=image_format,
+            quality=IMAGE_VARIANT_QUALITY,
+            optimize=True,
+        )
+        variant_ext: str = ext
+        if image_format != source_format:
+            variant_ext: str = f'.{image_format.lower()}'
+        variants[variant] = default_storage.save(
+            f'{root}_{variant}{variant_ext}',
+            ContentFile(buffer.getvalue()),
+        )
+    return variants
@@ -0,0 +1,438 @@
+"""
+Рассылка писем пользователям.
+
+Письмо о новости получают только подписчики ее категории услуг в ее
+районе (user.models.Subscription). Получатели делятся на диапазоны id,
+которые выбираются постранично по первичному ключу (keyset): каждая
+задача Celery получает границы диапазона, а не список адресов, и сама
+читает адреса по индексу.
+
+Пользователи с режимом дайджеста (User.news_digest) получают не письмо
+на каждую новость, а одно письмо за час или день со всеми новостями
+своих подписок. Экстренные новости (News.is_emergency) рассылаются
+сразу всем подписчикам и в дайджест не попадают.
+
+Каждая рассылка о новостях (info.models.Mailing) хранит получателей и
+статус отправки каждому, поэтому задача, прерванная на середине,
+продолжает с последней отметки, а служба видит ход рассылки по
+счетчикам.
+
+Скорость отправки всех рабочих процессов ограничена общей корзиной
+токенов в Redis (acquire_mail_tokens), а ответ почтового сервера о
+превышении лимита приостанавливает отправку для всех (throttle_mail).
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+import json
+import random
+import smtplib
+from typing import Iterator
+
+from django.db import transaction
+from django.db.models import F, Max, Q, QuerySet
+from django.utils import timezone
+
+from api.v1.utils import get_redis_client
+from info.models import Mailing, MailingRecipient, News
+from urban_utopia_2024.app_data import (
+    CHUNK_EMAIL_MAX, CHUNK_EMAIL_MIN, CITE_DOMAIN, EMAIL_NEWS_BATCH_LINK,
+    EMAIL_NEWS_DIGEST_TEXT, MAILING_STATUS_FAILED, MAILING_STATUS_PENDING,
+    MAILING_STATUS_SENT, MAIL_RATE_BURST, MAIL_RATE_KEY,
+    MAIL_RATE_PER_SECOND, MAIL_RETRY_BACKOFF, MAIL_RETRY_BACKOFF_MAX,
+    MAIL_TASKS_TARGET, MAIL_THROTTLE_KEY, NEWS_DIGEST_DELAY,
+    NEWS_DIGEST_INSTANT, NEWS_DIGEST_LAST_KEY, NEWS_DIGEST_PERIODS,
+    NEWS_DIGEST_PROGRESS_KEY,
+)
+from user.models import Subscription, User, normalize_text
+
+# INFO: KEYS[1] - корзина {tokens, ts}, KEYS[2] - пауза после ответа
+#       сервера о превышении лимита; ARGV - скорость, емкость, запрос.
+#       Время берется с сервера Redis, чтобы часы процессов не влияли.
+#       Возвращает строку: Lua обрезает дробные числа в ответе.
+TOKEN_BUCKET_SCRIPT: str = """
+local pause = redis.call('PTTL', KEYS[2])
+if pause > 0 then
+    return tostring(pause / 1000)
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = math.min(tonumber(ARGV[3]), capacity)
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+def get_recipients(
+    category_id: int,
+    district: str = None,
+    emergency: bool = False,
+) -> QuerySet:
+    """
+    Возвращает получателей письма о новости категории category_id в
+    районе district: подписчиков категории во всех районах или в district
+    с режимом рассылки instant, а для экстренной новости - всех.
+
+    Выборка - одно соединение с подписками по индексу
+    subscription_recipient_idx; условие на подписку задано одним
+    filter(), чтобы соединение не дублировалось. Район сравнивается
+    нормализованным (user.models.normalize_text).
+    """
+    recipients = User.objects.filter(
+        Q(subscription__district__isnull=True)
+        | Q(subscription__district=normalize_text(district)),
+        subscription__category_id=category_id,
+        is_staff=False,
+        is_municipal=False,
+    )
+    if not emergency:
+        recipients = recipients.filter(news_digest=NEWS_DIGEST_INSTANT)
+    return recipients.distinct()
+
+
+def get_digest_recipients(period: str, news_ids: list[int]) -> QuerySet:
+    """
+    Возвращает пользователей с режимом рассылки period, подписанных на
+    категорию хотя бы одной из новостей news_ids.
+    """
+    return User.objects.filter(
+        subscription__category__news__id__in=news_ids,
+        news_digest=period,
+        is_staff=False,
+        is_municipal=False,
+    ).distinct()
+
+
+def get_chunk_size(count: int) -> int:
+    """
+    Возвращает количество получателей на задачу для рассылки count
+    получателям: около MAIL_TASKS_TARGET задач в пределах
+    CHUNK_EMAIL_MIN - CHUNK_EMAIL_MAX получателей.
+    """
+    return min(
+        max(-(-count // MAIL_TASKS_TARGET), CHUNK_EMAIL_MIN),
+        CHUNK_EMAIL_MAX,
+    )
+
+
+def iter_id_pages(
+    queryset: QuerySet,
+    chunk_size: int,
+    last_id: int = 0,
+) -> Iterator[list[int]]:
+    """
+    Возвращает id объектов queryset больше last_id страницами по
+    chunk_size по возрастанию.
+
+    Каждая страница читается одним запросом id > последнего id
+    предыдущей по индексу первичного ключа, без OFFSET.
+    """
+    while True:
+        ids: list[int] = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list(
+                'id', flat=True,
+            )[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id: int = ids[-1]
+
+
+def add_recipients(mailing_id: int, user_ids: list[int]) -> None:
+    """
+    Записывает пользователей user_ids получателями рассылки mailing_id
+    одним INSERT; уже записанные (повторный запуск) пропускаются.
+    """
+    MailingRecipient.objects.bulk_create(
+        (
+            MailingRecipient(mailing_id=mailing_id, user_id=user_id)
+            for user_id in user_ids
+        ),
+        ignore_conflicts=True,
+    )
+    return
+
+
+def set_total(mailing_id: int, total: int) -> None:
+    """Записывает количество получателей рассылки mailing_id."""
+    Mailing.objects.filter(id=mailing_id).update(total=total)
+    return
+
+
+def get_total(mailing_id: int) -> int:
+    """Возвращает записанное количество получателей рассылки mailing_id."""
+    return Mailing.objects.values_list('total', flat=True).get(id=mailing_id)
+
+
+def count_recipients(mailing_id: int) -> int:
+    """Возвращает количество записанных получателей рассылки mailing_id."""
+    return MailingRecipient.objects.filter(mailing_id=mailing_id).count()
+
+
+def get_last_recipient_id(mailing_id: int) -> int:
+    """
+    Возвращает наибольший id пользователя, записанного получателем
+    рассылки mailing_id, или 0: с него продолжается постановка задач
+    рассылки после сбоя.
+    """
+    return MailingRecipient.objects.filter(
+        mailing_id=mailing_id,
+    ).aggregate(last_id=Max('user_id'))['last_id'] or 0
+
+
+def get_pending_recipients(
+    mailing_id: int,
+    min_id: int,
+    max_id: int,
+) -> list[tuple[int, str]]:
+    """
+    Возвращает (id получателя, адрес) ожидающих письма получателей
+    рассылки mailing_id с id пользователя от min_id до max_id.
+
+    Получатели с отмеченным статусом пропускаются, поэтому повтор задачи
+    продолжает рассылку с последней отметки (mark_recipients).
+    """
+    return list(
+        MailingRecipient.objects.filter(
+            mailing_id=mailing_id,
+            status=MAILING_STATUS_PENDING,
+            user_id__gte=min_id,
+            user_id__lte=max_id,
+        ).order_by('user_id').values_list('id', 'user__email')
+    )
+
+
+@transaction.atomic
+def mark_recipients(
+    mailing_id: int,
+    sent_ids: list[int],
+    failed_ids: list[int],
+) -> None:
+    """
+    Отмечает получателей рассылки mailing_id отправленными (sent_ids) и
+    недоставленными (failed_ids) и обновляет счетчики рассылки.
+
+    Счетчики увеличиваются на число действительно измененных строк,
+    поэтому повторная отметка их не искажает.
+    """
+    recipients = MailingRecipient.objects.filter(
+        mailing_id=mailing_id,
+        status=MAILING_STATUS_PENDING,
+    )
+    sent: int = recipients.filter(id__in=sent_ids).update(
+        status=MAILING_STATUS_SENT,
+    ) if sent_ids else 0
+    failed: int = recipients.filter(id__in=failed_ids).update(
+        status=MAILING_STATUS_FAILED,
+    ) if failed_ids else 0
+    if sent or failed:
+        Mailing.objects.filter(id=mailing_id).update(
+            sent=F('sent') + sent,
+            failed=F('failed') + failed,
+        )
+    return
+
+
+def get_digest_news(period: str) -> tuple[list[int], datetime]:
+    """
+    Возвращает id новостей для дайджеста period и конец его окна.
+
+    Окно начинается с конца окна последнего отправленного дайджеста
+    (mark_digest_sent), поэтому пропущенный запуск не теряет новости,
+    и заканчивается за NEWS_DIGEST_DELAY секунд до текущего момента.
+    """
+    end: datetime = timezone.now() - timedelta(seconds=NEWS_DIGEST_DELAY)
+    last: bytes = get_redis_client().get(f'{NEWS_DIGEST_LAST_KEY}:{period}')
+    if last is None:
+        start: datetime = end - timedelta(
+            seconds=NEWS_DIGEST_PERIODS[period][0]
+        )
+    else:
+        start: datetime = datetime.fromtimestamp(
+            float(last), tz=dt_timezone.utc,
+        )
+    news_ids: list[int] = list(
+        News.objects.filter(
+            pub_date__gte=start,
+            pub_date__lt=end,
+            is_emergency=False,
+        ).order_by('id').values_list('id', flat=True)
+    )
+    return news_ids, end
+
+
+def get_digest_progress(
+    period: str,
+) -> tuple[list[int], datetime, int]:
+    """
+    Возвращает ход незаконченной отправки дайджеста period: id новостей,
+    конец окна и id последнего получателя, для которого поставлена
+    задача, или None, если незаконченной отправки нет.
+    """
+    progress: bytes = get_redis_client().get(
+        f'{NEWS_DIGEST_PROGRESS_KEY}:{period}'
+    )
+    if progress is None:
+        return None
+    news_ids, end, last_id = json.loads(progress)
+    return (
+        news_ids,
+        datetime.fromtimestamp(end, tz=dt_timezone.utc),
+        last_id,
+    )
+
+
+def set_digest_progress(
+    period: str,
+    news_ids: list[int],
+    end: datetime,
+    last_id: int,
+) -> None:
+    """Запоминает ход отправки дайджеста period (get_digest_progress)."""
+    get_redis_client().set(
+        f'{NEWS_DIGEST_PROGRESS_KEY}:{period}',
+        json.dumps((news_ids, end.timestamp(), last_id)),
+    )
+    return
+
+
+def mark_digest_sent(period: str, end: datetime) -> None:
+    """
+    Запоминает конец окна отправленного дайджеста period и удаляет ход
+    его отправки.
+    """
+    client = get_redis_client()
+    client.set(f'{NEWS_DIGEST_LAST_KEY}:{period}', end.timestamp())
+    client.delete(f'{NEWS_DIGEST_PROGRESS_KEY}:{period}')
+    return
+
+
+def get_digest_messages(
+    period: str,
+    news_ids: list[int],
+    min_id: int,
+    max_id: int,
+) -> list[tuple[int, str, str]]:
+    """
+    Возвращает письма дайджеста period (id получателя, адресат, текст)
+    получателям get_digest_recipients с id от min_id до max_id по
+    возрастанию id.
+
+    В письмо каждого получателя попадают только новости его подписок:
+    новости и подписки всего диапазона читаются двумя запросами.
+    """
+    news: list[dict] = list(
+        News.objects.filter(id__in=news_ids).order_by('id').values(
+            'id', 'category_id', 'category__name', 'address__district',
+        )
+    )
+    subscriptions: dict[tuple[int, str], set[tuple[int, str]]] = (
+        defaultdict(set)
+    )
+    for user_id, email, category_id, district in Subscription.objects.filter(
+        user__in=get_digest_recipients(
+            period=period,
+            news_ids=news_ids,
+        ).filter(id__gte=min_id, id__lte=max_id),
+        category_id__in={item.get('category_id') for item in news},
+    ).order_by('user_id').values_list(
+        'user_id', 'user__email', 'category_id', 'district',
+    ):
+        subscriptions[(user_id, email)].add((category_id, district))
+    messages: list[tuple[int, str, str]] = []
+    for (user_id, email), subscribed in subscriptions.items():
+        links: list[str] = [
+            EMAIL_NEWS_BATCH_LINK.format(
+                category=item.get('category__name'),
+                link=f'https://{CITE_DOMAIN}/api/v1/news/{item.get("id")}/',
+            ) for item in news
+            if (item.get('category_id'), None) in subscribed
+            or (
+                item.get('category_id'),
+                normalize_text(item.get('address__district')),
+            ) in subscribed
+        ]
+        if links:
+            messages.append(
+                (
+                    user_id,
+                    email,
+                    EMAIL_NEWS_DIGEST_TEXT.format(
+                        period=NEWS_DIGEST_PERIODS[period][1],
+                        links='\n'.join(links),
+                    ),
+                )
+            )
+    return messages
+
+
+def acquire_mail_tokens(count: int) -> float:
+    """
+    Берет из общей корзины токены на отправку count писем.
+
+    Возвращает 0, если токены получены, иначе - через сколько секунд
+    их будет достаточно (корзина при этом не расходуется).
+    """
+    script = get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+    return float(
+        script(
+            keys=(MAIL_RATE_KEY, MAIL_THROTTLE_KEY),
+            args=(MAIL_RATE_PER_SECOND, MAIL_RATE_BURST, count),
+        )
+    )
+
+
+def throttle_mail(seconds: float) -> None:
+    """Приостанавливает отправку писем всеми процессами на seconds сек."""
+    get_redis_client().set(MAIL_THROTTLE_KEY, 1, px=int(seconds * 1000))
+    return
+
+
+def get_retry_countdown(retries: int) -> float:
+    """
+    Возвращает задержку повтора задачи рассылки номер retries:
+    экспоненциальную, со случайным разбросом, чтобы повторы задач
+    не совпадали по времени.
+    """
+    backoff: int = min(
+        MAIL_RETRY_BACKOFF * 2 ** retries,
+        MAIL_RETRY_BACKOFF_MAX,
+    )
+    return random.uniform(backoff / 2, backoff)
+
+
+def is_mail_throttled(exc: Exception) -> bool:
+    """Проверяет, что почтовый сервер временно отклонил отправку (4xx)."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(
+            400 <= code < 500 for code, _ in exc.recipients.values()
+        )
+    return isinstance(exc, smtplib.SMTPResponseException) and (
+        400 <= exc.smtp_code < 500
+    )
+
+
+def is_mail_error_transient(exc: Exception) -> bool:
+    """
+    Проверяет, что отправку письма имеет смысл повторить: сервер
+    ответил 4xx или соединение разорвано (ответ 5xx - отказ).
+    """
+    if isinstance(
+        exc, (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)
+    ):
+        return is_mail_throttled(exc)
+    return isinstance(exc, OSError)
@@ -1,3 +1,5 @@
+import uuid
+
 from django.core.validators import MaxValueValidator
 from django.db import models
 
@@ -5,10 +7,13 @@ from urban_utopia_2024.app_data import (
     APPEAL_RATING_MAX_VAL, APPEAL_RATING_MESSAGE,
     APPEAL_STATUS_CHOICES, APPEAL_STAGE_INITIAL, APPEAL_STATUS_MAX_LEN,
     APPEAL_TEXT_MAX_LEN, APPEAL_TOPIC_MAX_LEN,
+    MAILING_STATUS_CHOICES, MAILING_STATUS_MAX_LEN, MAILING_STATUS_PENDING,
+    MAILING_SUBJECT_MAX_LEN,
     NEWS_COMMENT_MAX_LEN, NEWS_COMMENT_SLICE,
-    NEWS_PICTURES_PATH, NEWS_TEXT_MAX_LEN,
+    NEWS_PICTURES_PATH, NEWS_TEXT_MAX_LEN, OUTBOX_TASK_MAX_LEN,
     TASK_TITLE_MAX_LEN,
     QUIZ_ANSWER_MAX_LEN, QUIZ_ANSWER_SLICE, QUIZ_TITLE_MAX_LEN,
+    UPLOAD_FILENAME_MAX_LEN, UPLOAD_MAX_SIZE,
 )
 from user.models import Address, ServiceCategory, User
 
@@ -89,6 +94,14 @@ class Answer(models.Model):
         verbose_name='Ответ',
         max_length=QUIZ_ANSWER_MAX_LEN,
     )
+    # INFO: денормализованный счетчик голосов. Голоса через API
+    #       накапливаются в Redis и переносятся сюда задачей
+    #       info.tasks.flush_vote_counts, остальные изменения
+    #       AnswerUser учитываются сигналами (info.signals).
+    vote_count = models.PositiveIntegerField(
+        verbose_name='Количество голосов',
+        default=0,
+    )
 
     class Meta:
         constraints = (
@@ -177,8 +190,20 @@ class News(models.Model):
         blank=True,
         null=True,
     )
+    # INFO: экстренная новость рассылается сразу всем подписчикам,
+    #       в том числе получающим дайджест (info.mailing).
+    is_emergency = models.BooleanField(
+        verbose_name='Экстренная новость',
+        default=False,
+    )
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='news_pub_date_id_idx',
+            ),
+        )
         ordering = ('id',)
         verbose_name = 'Новость'
         verbose_name_plural = 'Новости'
@@ -218,6 +243,12 @@ class NewsComment(models.Model):
                 name='unique_single_comment',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('news', 'pub_date'),
+                name='news_comment_pub_date_idx',
+            ),
+        )
         ordering = ('pub_date',)
         verbose_name = 'Комментарий новости'
         verbose_name_plural = 'Комментарии новостей'
@@ -239,6 +270,14 @@ class NewsPicture(models.Model):
         verbose_name='Картинка',
         upload_to=NEWS_PICTURES_PATH,
     )
+    # INFO: уменьшенные копии картинки, заполняются задачей
+    #       info.tasks.make_image_variants (info.images).
+    picture_variants = models.JSONField(
+        verbose_name='Копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         constraints = (
@@ -331,3 +370,211 @@ class Appeal(models.Model):
 
     def __str__(self):
         return f'{self.user} ({self.pub_date})'
+
+
+class Upload(models.Model):
+    """
+    Модель загрузки файла частями.
+
+    Части записываются в файл во временном каталоге (info.uploads),
+    offset - количество уже принятых байт. Завершенная (committed)
+    загрузка указывается при создании новости вместо самого файла.
+    """
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        related_name='upload',
+        on_delete=models.CASCADE,
+    )
+    filename = models.CharField(
+        verbose_name='Имя файла',
+        max_length=UPLOAD_FILENAME_MAX_LEN,
+    )
+    size = models.PositiveIntegerField(
+        verbose_name='Размер файла (байт)',
+        validators=(
+            MaxValueValidator(
+                UPLOAD_MAX_SIZE,
+                'Файл слишком большой.',
+            ),
+        ),
+    )
+    offset = models.PositiveIntegerField(
+        verbose_name='Принято байт',
+        default=0,
+    )
+    committed = models.BooleanField(
+        verbose_name='Загрузка завершена',
+        default=False,
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата и время создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('pub_date',)
+        verbose_name = 'Загрузка файла'
+        verbose_name_plural = 'Загрузки файлов'
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
+
+
+class Mailing(models.Model):
+    """
+    Модель рассылки письма о новостях.
+
+    Счетчики total, sent и failed обновляются вместе со статусами
+    получателей (info.mailing), поэтому ход рассылки читается без
+    подсчета строк MailingRecipient.
+    """
+
+    municipal = models.ForeignKey(
+        verbose_name='Муниципальная служба',
+        to=User,
+        related_name='mailing',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=MAILING_SUBJECT_MAX_LEN,
+    )
+    message = models.TextField(
+        verbose_name='Текст',
+    )
+    total = models.PositiveIntegerField(
+        verbose_name='Получателей',
+        default=0,
+    )
+    sent = models.PositiveIntegerField(
+        verbose_name='Отправлено',
+        default=0,
+    )
+    failed = models.PositiveIntegerField(
+        verbose_name='Не доставлено',
+        default=0,
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата и время создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'Рассылка'
+        verbose_name_plural = 'Рассылки'
+
+    def __str__(self):
+        return f'{self.subject} ({self.sent}/{self.total})'
+
+
+class MailingRecipient(models.Model):
+    """Модель получателя рассылки и статуса отправки ему письма."""
+
+    mailing = models.ForeignKey(
+        verbose_name='Рассылка',
+        to=Mailing,
+        related_name='recipient',
+        on_delete=models.CASCADE,
+    )
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        related_name='mailing_recipient',
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=MAILING_STATUS_MAX_LEN,
+        choices=MAILING_STATUS_CHOICES,
+        default=MAILING_STATUS_PENDING,
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('mailing', 'user'),
+                name='unique_mailing_recipient',
+            ),
+        )
+        # INFO: задача рассылки выбирает неотправленных получателей
+        #       своего диапазона id (info.mailing.get_pending_recipients).
+        indexes = (
+            models.Index(
+                fields=('mailing', 'status', 'user'),
+                name='mailing_recipient_status_idx',
+            ),
+        )
+        ordering = ('id',)
+        verbose_name = 'Получатель рассылки'
+        verbose_name_plural = 'Получатели рассылки'
+
+    def __str__(self):
+        return f'{self.user} ({self.status})'
+
+
+class Outbox(models.Model):
+    """
+    Модель исходящей задачи Celery.
+
+    Задача записывается в одной транзакции с изменением данных и
+    отправляется брокеру задачей info.tasks.relay_outbox (info.outbox):
+    запрос не ждет брокер, а при откате транзакции задача не уходит.
+    """
+
+    task = models.CharField(
+        verbose_name='Задача',
+        max_length=OUTBOX_TASK_MAX_LEN,
+    )
+    kwargs = models.JSONField(
+        verbose_name='Аргументы',
+        default=dict,
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата и время создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Исходящая задача'
+        verbose_name_plural = 'Исходящие задачи'
+
+    def __str__(self):
+        return f'{self.task} ({self.pub_date})'
+
+
+class VoteFlush(models.Model):
+    """
+    Модель отметки о переносе буфера голосов из Redis в БД.
+
+    Отметка создается в одной транзакции с обновлением счетчиков
+    (info.votes.flush_vote_counts), поэтому буфер, оставшийся в Redis
+    после сбоя, не применяется повторно.
+    """
+
+    flush_id = models.UUIDField(
+        verbose_name='Идентификатор буфера',
+        unique=True,
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата и время переноса',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Перенос голосов'
+        verbose_name_plural = 'Переносы голосов'
+
+    def __str__(self):
+        return f'{self.flush_id} ({self.pub_date})'
@@ -0,0 +1,59 @@
+"""
+Исходящие задачи Celery (transactional outbox).
+
+Задачи, которые должны уйти только вместе с изменением данных, не
+отправляются брокеру из запроса, а записываются в info.models.Outbox в
+той же транзакции. Задача info.tasks.relay_outbox забирает записи
+пачками (SELECT ... FOR UPDATE SKIP LOCKED, поэтому несколько
+пересыльщиков не мешают друг другу), отправляет их брокеру через одно
+соединение и удаляет. Доставка - "хотя бы один раз": если транзакция
+пересыльщика не зафиксируется после отправки, пачка уйдет повторно.
+"""
+
+from celery import Task, current_app
+from django.db import transaction
+
+from info.models import Outbox
+from urban_utopia_2024.app_data import (
+    OUTBOX_BATCH_SIZE, OUTBOX_RELAY_MAX_BATCHES,
+)
+
+
+def enqueue(task: Task, *kwargs: dict) -> None:
+    """Записывает вызовы задачи task с аргументами kwargs одним INSERT."""
+    Outbox.objects.bulk_create(
+        Outbox(task=task.name, kwargs=item) for item in kwargs
+    )
+    return
+
+
+def relay_outbox() -> int:
+    """
+    Отправляет брокеру исходящие задачи пачками по OUTBOX_BATCH_SIZE.
+
+    Возвращает количество отправленных задач.
+    """
+    sent: int = 0
+    for _ in range(OUTBOX_RELAY_MAX_BATCHES):
+        with transaction.atomic():
+            rows: list[tuple[int, str, dict]] = list(
+                Outbox.objects.select_for_update(
+                    skip_locked=True,
+                ).order_by('id').values_list(
+                    'id', 'task', 'kwargs',
+                )[:OUTBOX_BATCH_SIZE]
+            )
+            if not rows:
+                break
+            with current_app.producer_or_acquire() as producer:
+                for _, task, kwargs in rows:
+                    current_app.send_task(
+                        task,
+                        kwargs=kwargs,
+                        producer=producer,
+                    )
+            Outbox.objects.filter(id__in=[row[0] for row in rows]).delete()
+        sent += len(rows)
+        if len(rows) < OUTBOX_BATCH_SIZE:
+            break
+    return sent
@@ -0,0 +1,118 @@
+"""
+Рейтинг муниципальных служб.
+
+Для каждой службы хранятся сумма (User.rating_sum) и количество
+(User.rating_count) оценок ответов на обращения, а в User.rating -
+их среднее, поэтому рейтинг читается без агрегации обращений.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, FloatField, Sum, Value,
+    When,
+)
+from django.db.models.functions import Cast
+
+from api.v1.utils import bump_cache_versions_on_commit
+from info.models import Appeal
+from urban_utopia_2024.app_data import (
+    APPEAL_CACHE_VERSION_KEY, RATING_RECONCILE_BATCH_SIZE,
+)
+from user.models import User
+
+_RATING_FIELD: DecimalField = User._meta.get_field('rating')
+
+
+def add_ratings(municipal_ids: list[int], rating: int) -> None:
+    """
+    Добавляет оценку rating к рейтингу служб municipal_ids.
+
+    Служба, указанная несколько раз, получает оценку столько же раз.
+    Сумма, количество и среднее службы меняются одним UPDATE от текущих
+    значений строки, поэтому одновременные оценки не теряются. Вызывать
+    в транзакции, записывающей сами оценки обращений.
+    """
+    for municipal_id, rating_count in Counter(municipal_ids).items():
+        rating_sum: int = rating * rating_count
+        User.objects.filter(id=municipal_id).update(
+            rating_sum=F('rating_sum') + rating_sum,
+            rating_count=F('rating_count') + rating_count,
+            rating=_average(
+                rating_sum=F('rating_sum') + rating_sum,
+                rating_count=F('rating_count') + Value(rating_count),
+            ),
+        )
+    return
+
+
+@transaction.atomic
+def reconcile_ratings() -> int:
+    """
+    Пересчитывает рейтинг всех служб по оценкам обращений.
+
+    Оценки агрегируются одним сгруппированным запросом, записываются
+    только разошедшиеся суммы и количества, а среднее пересчитывается
+    тем же выражением, что и в add_ratings. Строки служб блокируются
+    на время пересчета: оценки, поставленные параллельно, применятся
+    после него поверх пересчитанных значений. Возвращает количество
+    исправленных служб.
+    """
+    municipals: list[dict] = list(
+        User.objects.select_for_update().filter(
+            is_municipal=True,
+        ).values('id', 'rating_sum', 'rating_count', 'rating')
+    )
+    totals: dict[int, dict] = {
+        row['municipal_id']: row for row in Appeal.objects.filter(
+            rating__isnull=False,
+        ).order_by().values('municipal_id').annotate(
+            rating_sum=Sum('rating'),
+            rating_count=Count('rating'),
+        )
+    }
+    fixed: list[User] = []
+    for municipal in municipals:
+        total: dict = totals.get(municipal['id'], {})
+        rating_sum: int = total.get('rating_sum', 0)
+        rating_count: int = total.get('rating_count', 0)
+        if (municipal['rating_sum'], municipal['rating_count']) != (
+            rating_sum, rating_count,
+        ):
+            fixed.append(
+                User(
+                    id=municipal['id'],
+                    rating_sum=rating_sum,
+                    rating_count=rating_count,
+                )
+            )
+    if not fixed:
+        return 0
+    User.objects.bulk_update(
+        fixed,
+        fields=('rating_sum', 'rating_count'),
+        batch_size=RATING_RECONCILE_BATCH_SIZE,
+    )
+    User.objects.filter(
+        id__in=[municipal.id for municipal in fixed],
+    ).update(
+        rating=Case(
+            When(rating_count=0, then=Value(0)),
+            output_field=_RATING_FIELD,
+            default=_average(
+                rating_sum=F('rating_sum'),
+                rating_count=F('rating_count'),
+            ),
+        ),
+    )
+    bump_cache_versions_on_commit(APPEAL_CACHE_VERSION_KEY)
+    return len(fixed)
+
+
+def _average(rating_sum, rating_count) -> ExpressionWrapper:
+    """Средняя оценка; округляется БД при записи в поле User.rating."""
+    return ExpressionWrapper(
+        Cast(rating_sum, FloatField()) / rating_count,
+        output_field=_RATING_FIELD,
+    )
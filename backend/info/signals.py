@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.v1.utils import bump_cache_versions_on_commit, reset_address_keys
+from info.images import IMAGE_FIELDS, get_variants
+from info.models import (
+    Answer, AnswerUser, Appeal, News, NewsComment, NewsPicture, Quiz,
+)
+from info.tasks import schedule_image_variants
+from urban_utopia_2024.app_data import (
+    APPEAL_CACHE_VERSION_KEY, NEWS_CACHE_VERSION_KEY,
+)
+from user.models import Address, User
+
+
+@receiver(post_save, sender=AnswerUser)
+def answer_user_created(sender, instance, created, **kwargs):
+    """Увеличивает счетчик голосов ответа при новом голосе."""
+    if created:
+        Answer.objects.filter(id=instance.answer_id).update(
+            vote_count=F('vote_count') + 1,
+        )
+    return
+
+
+@receiver(post_delete, sender=AnswerUser)
+def answer_user_deleted(sender, instance, **kwargs):
+    """Уменьшает счетчик голосов ответа при удалении голоса."""
+    Answer.objects.filter(
+        id=instance.answer_id,
+        vote_count__gt=0,
+    ).update(
+        vote_count=F('vote_count') - 1,
+    )
+    return
+
+
+@receiver(post_save, sender=NewsPicture)
+@receiver(post_save, sender=User)
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    """Ставит в очередь создание копий нового или замененного изображения."""
+    field: str = IMAGE_FIELDS[sender._meta.label]
+    if update_fields is not None and field not in update_fields:
+        return
+    name: str = getattr(instance, field).name
+    if name and get_variants(
+        variants=getattr(instance, f'{field}_variants'),
+        name=name,
+    ) is None:
+        schedule_image_variants(instances=(instance,))
+    return
+
+
+@receiver(post_delete, sender=Address)
+@receiver(post_save, sender=Address)
+def address_changed(sender, created=False, **kwargs):
+    """
+    Сбрасывает кэши ключей адресов (api.v1.utils.resolve_address) после
+    фиксации транзакции, в которой адрес изменен или удален.
+    """
+    if not created:
+        transaction.on_commit(reset_address_keys)
+    return
+
+
+@receiver(post_delete, sender=Appeal)
+@receiver(post_save, sender=Appeal)
+def appeal_changed(sender, **kwargs):
+    """Обновляет версию обращений после фиксации транзакции."""
+    bump_cache_versions_on_commit(APPEAL_CACHE_VERSION_KEY)
+    return
+
+
+@receiver(post_delete, sender=Answer)
+@receiver(post_delete, sender=AnswerUser)
+@receiver(post_delete, sender=News)
+@receiver(post_delete, sender=NewsComment)
+@receiver(post_delete, sender=NewsPicture)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Answer)
+@receiver(post_save, sender=AnswerUser)
+@receiver(post_save, sender=News)
+@receiver(post_save, sender=NewsComment)
+@receiver(post_save, sender=NewsPicture)
+@receiver(post_save, sender=Quiz)
+def news_changed(sender, **kwargs):
+    """
+    Сбрасывает кэш ответов новостей после фиксации транзакции,
+    в которой изменились данные, отображаемые в новостях.
+    """
+    bump_cache_versions_on_commit(NEWS_CACHE_VERSION_KEY)
+    return
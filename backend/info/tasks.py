@@ -1,38 +1,386 @@
-from celery import group, shared_task
+from celery import Task, shared_task
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from celery.signals import worker_process_shutdown
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Model
 
-from api.v1.utils import send_mail
-from urban_utopia_2024.app_data import CHUNK_EMAIL
-from user.models import User
+from api.v1.utils import (
+    bump_cache_versions_on_commit, close_mail_connection, send_mail,
+    send_mail_messages,
+)
+from info import images, mailing, outbox, ratings, uploads, votes
+from info.models import Mailing
+from urban_utopia_2024.app_data import (
+    APPEAL_CACHE_VERSION_KEY, EMAIL_NEWS_SUBJECT,
+    IMAGE_TASK_SOFT_TIME_LIMIT, IMAGE_TASK_TIME_LIMIT, MAILING_MARK_BATCH_SIZE,
+    MAIL_PRODUCER_SOFT_TIME_LIMIT, MAIL_PRODUCER_TIME_LIMIT,
+    MAIL_RETRY_MAX, MAIL_TASK_SOFT_TIME_LIMIT, MAIL_TASK_TIME_LIMIT,
+    NEWS_CACHE_VERSION_KEY,
+)
+
+# Параметры задач, отправляющих письма (см. send_mail_chunk).
+MAIL_TASK_OPTIONS: dict = {
+    'bind': True,
+    'max_retries': MAIL_RETRY_MAX,
+    'soft_time_limit': MAIL_TASK_SOFT_TIME_LIMIT,
+    'time_limit': MAIL_TASK_TIME_LIMIT,
+}
+# Параметры задач, ставящих в очередь задачи рассылки: сообщение
+# подтверждается после выполнения и возвращается в очередь при потере
+# рабочего процесса, а повторы по мягкому лимиту времени не ограничены -
+# каждый продолжает с места предыдущего.
+MAIL_PRODUCER_TASK_OPTIONS: dict = {
+    'bind': True,
+    'acks_late': True,
+    'reject_on_worker_lost': True,
+    'max_retries': None,
+    'soft_time_limit': MAIL_PRODUCER_SOFT_TIME_LIMIT,
+    'time_limit': MAIL_PRODUCER_TIME_LIMIT,
+}
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_mass_mail(self, mailing_id: int, min_id: int, max_id: int) -> int:
+    """
+    Отправляет письма рассылки mailing_id получателям с id от min_id до
+    max_id, которым оно еще не отправлено, через соединение с почтовым
+    сервером, общее для задач рабочего процесса.
+    """
+    subject, message = Mailing.objects.values_list(
+        'subject', 'message',
+    ).get(id=mailing_id)
+    return send_mail_chunk(
+        task=self,
+        subject=subject,
+        messages=[
+            (recipient_id, email, message)
+            for recipient_id, email in mailing.get_pending_recipients(
+                mailing_id=mailing_id,
+                min_id=min_id,
+                max_id=max_id,
+            )
+        ],
+        mailing_id=mailing_id,
+    )
+
+
+@shared_task(**MAIL_PRODUCER_TASK_OPTIONS)
+def send_mass_mail_async(
+    self,
+    mailing_id: int,
+    category_id: int,
+    district: str = None,
+    emergency: bool = False,
+) -> int:
+    """
+    Задача по рассылке mailing_id о новости категории category_id в
+    районе district: подписчикам без дайджеста, а экстренной новости -
+    всем.
+
+    Записывает получателей рассылки страницами по id и на каждую ставит
+    в очередь задачу send_mass_mail (info.mailing) через info.outbox:
+    задача записывается в одной транзакции со страницей и уходит брокеру
+    только после ее фиксации. Повтор задачи (по мягкому лимиту времени
+    или после потери рабочего процесса) продолжает с последнего
+    записанного получателя. Возвращает количество поставленных задач.
+    """
+    recipients = mailing.get_recipients(
+        category_id=category_id,
+        district=district,
+        emergency=emergency,
+    )
+    last_id: int = mailing.get_last_recipient_id(mailing_id=mailing_id)
+    if last_id:
+        count: int = mailing.get_total(mailing_id=mailing_id)
+    else:
+        count: int = recipients.count()
+        mailing.set_total(mailing_id=mailing_id, total=count)
+    tasks: int = 0
+    try:
+        for user_ids in mailing.iter_id_pages(
+            queryset=recipients,
+            chunk_size=mailing.get_chunk_size(count=count),
+            last_id=last_id,
+        ):
+            with transaction.atomic():
+                mailing.add_recipients(
+                    mailing_id=mailing_id,
+                    user_ids=user_ids,
+                )
+                outbox.enqueue(
+                    send_mass_mail,
+                    {
+                        'mailing_id': mailing_id,
+                        'min_id': user_ids[0],
+                        'max_id': user_ids[-1],
+                    },
+                )
+            tasks += 1
+    except SoftTimeLimitExceeded as exc:
+        raise self.retry(exc=exc, countdown=0)
+    # INFO: получатели могли измениться после подсчета.
+    total: int = mailing.count_recipients(mailing_id=mailing_id)
+    if total != count:
+        mailing.set_total(mailing_id=mailing_id, total=total)
+    return tasks
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_news_digest(
+    self,
+    period: str,
+    news_ids: list[int],
+    min_id: int,
+    max_id: int,
+) -> int:
+    """
+    Отправляет дайджест period о новостях news_ids получателям с id от
+    min_id до max_id: каждому - одно письмо с новостями его подписок.
+    """
+    return send_mail_chunk(
+        task=self,
+        subject=EMAIL_NEWS_SUBJECT,
+        messages=mailing.get_digest_messages(
+            period=period,
+            news_ids=news_ids,
+            min_id=min_id,
+            max_id=max_id,
+        ),
+    )
+
+
+@shared_task(**MAIL_PRODUCER_TASK_OPTIONS)
+def send_news_digest_async(self, period: str) -> int:
+    """
+    Задача по рассылке дайджеста новостей за период period (hourly/daily).
+
+    Ставит в очередь задачи send_news_digest по диапазонам id
+    получателей. Ход отправки запоминается после каждой задачи
+    (info.mailing.set_digest_progress), поэтому повтор задачи (по мягкому
+    лимиту времени или после потери рабочего процесса) продолжает с
+    последнего получателя того же окна. Возвращает количество
+    поставленных задач.
+    """
+    progress: tuple = mailing.get_digest_progress(period=period)
+    if progress is None:
+        news_ids, end = mailing.get_digest_news(period=period)
+        last_id: int = 0
+    else:
+        news_ids, end, last_id = progress
+    tasks: int = 0
+    if news_ids:
+        recipients = mailing.get_digest_recipients(
+            period=period,
+            news_ids=news_ids,
+        )
+        try:
+            for user_ids in mailing.iter_id_pages(
+                queryset=recipients,
+                chunk_size=mailing.get_chunk_size(count=recipients.count()),
+                last_id=last_id,
+            ):
+                send_news_digest.delay(
+                    period=period,
+                    news_ids=news_ids,
+                    min_id=user_ids[0],
+                    max_id=user_ids[-1],
+                )
+                mailing.set_digest_progress(
+                    period=period,
+                    news_ids=news_ids,
+                    end=end,
+                    last_id=user_ids[-1],
+                )
+                tasks += 1
+        except SoftTimeLimitExceeded as exc:
+            raise self.retry(exc=exc, countdown=0)
+    mailing.mark_digest_sent(period=period, end=end)
+    return tasks
+
+
+@shared_task(bind=True, max_retries=MAIL_RETRY_MAX)
+def send_mail_async(self, subject: str, message: str, to: list[str]) -> None:
+    """
+    Задача по отправке письма пользователям to (код подтверждения почты,
+    регистрация).
+
+    Выполняется в отдельной от рассылок очереди, поэтому не ждет их. При
+    временной ошибке сервера повторяется с экспоненциальной задержкой.
+    """
+    try:
+        send_mail(subject=subject, message=message, to=to)
+    except OSError as exc:
+        if not mailing.is_mail_error_transient(exc):
+            raise
+        raise self.retry(
+            exc=exc,
+            countdown=mailing.get_retry_countdown(
+                retries=self.request.retries,
+            ),
+        )
+    return
+
+
+def send_mail_chunk(
+    task: Task,
+    subject: str,
+    messages: list[tuple[int, str, str]],
+    mailing_id: int = None,
+) -> int:
+    """
+    Отправляет письма messages (id получателя, адресат, текст) из задачи
+    рассылки task.
+
+    Если общая корзина токенов пуста или отправка приостановлена, задача
+    возвращается в очередь с нужной задержкой и не занимает рабочий
+    процесс. При временной ошибке сервера и по мягкому лимиту времени
+    задача повторяется с экспоненциальной задержкой, а ответ сервера о
+    превышении лимита приостанавливает отправку всеми процессами.
+
+    Для рассылки mailing_id статусы получателей отмечаются пачками по
+    MAILING_MARK_BATCH_SIZE писем и перед повтором; без mailing_id
+    (дайджест) письма messages идут по возрастанию id получателя, и
+    повтор получает min_id после последнего обработанного. Поэтому
+    повтор не отправляет писем повторно; письмо, окончательно
+    отклоненное сервером, отмечается недоставленным. Возвращает
+    количество отправленных писем.
+    """
+    if not messages:
+        return 0
+    wait: float = mailing.acquire_mail_tokens(count=len(messages))
+    if wait:
+        # INFO: не task.retry(): ожидание токенов - не ошибка и не должно
+        #       расходовать повторы задачи.
+        signature = task.signature_from_request(countdown=wait)
+        signature.apply_async()
+        raise Retry(when=wait, sig=signature)
+    countdown: float = mailing.get_retry_countdown(
+        retries=task.request.retries,
+    )
+    total: int = 0
+    done_id: int = None
+    try:
+        for start in range(0, len(messages), MAILING_MARK_BATCH_SIZE):
+            sent_ids: list[int] = []
+            failed_ids: list[int] = []
+            try:
+                for recipient_id, email, message in messages[
+                    start:start + MAILING_MARK_BATCH_SIZE
+                ]:
+                    try:
+                        send_mail_messages(
+                            subject=subject,
+                            messages=((email, message),),
+                        )
+                    except OSError as exc:
+                        if mailing.is_mail_error_transient(exc):
+                            raise
+                        failed_ids.append(recipient_id)
+                    else:
+                        sent_ids.append(recipient_id)
+                    done_id: int = recipient_id
+            finally:
+                if mailing_id is not None:
+                    mailing.mark_recipients(
+                        mailing_id=mailing_id,
+                        sent_ids=sent_ids,
+                        failed_ids=failed_ids,
+                    )
+            total += len(sent_ids)
+    except SoftTimeLimitExceeded as exc:
+        close_mail_connection()
+        raise task.retry(
+            exc=exc,
+            countdown=countdown,
+            kwargs=_get_retry_kwargs(task, mailing_id, done_id),
+        )
+    except OSError as exc:
+        if mailing.is_mail_throttled(exc):
+            mailing.throttle_mail(seconds=countdown)
+        raise task.retry(
+            exc=exc,
+            countdown=countdown,
+            kwargs=_get_retry_kwargs(task, mailing_id, done_id),
+        )
+    return total
+
+
+def _get_retry_kwargs(task: Task, mailing_id: int, done_id: int) -> dict:
+    kwargs: dict = task.request.kwargs
+    if mailing_id is None and done_id is not None:
+        kwargs: dict = {**kwargs, 'min_id': done_id + 1}
+    return kwargs
+
+
+@shared_task
+def flush_vote_counts() -> int:
+    """Задача по переносу буфера голосов из Redis в БД."""
+    return votes.flush_vote_counts()
+
+
+@shared_task
+def relay_outbox() -> int:
+    """Задача по отправке исходящих задач (info.outbox) брокеру."""
+    return outbox.relay_outbox()
 
 
 @shared_task
-def send_mass_mail(subject: str, message: str, user_emails: list[str]) -> None:
-    """Отправляет письма указанным адресатам в user_emails."""
-    for email in user_emails:
-        send_mail(subject=subject, message=message, to=(email,))
+def reconcile_municipal_ratings() -> int:
+    """Задача по сверке рейтинга муниципальных служб с оценками обращений."""
+    return ratings.reconcile_ratings()
+
+
+@shared_task(
+    soft_time_limit=IMAGE_TASK_SOFT_TIME_LIMIT,
+    time_limit=IMAGE_TASK_TIME_LIMIT,
+)
+def make_image_variants(model: str, pk: int) -> None:
+    """
+    Задача по созданию уменьшенных копий изображения объекта pk модели
+    model (info.images.IMAGE_FIELDS).
+    """
+    field: str = images.IMAGE_FIELDS[model]
+    queryset = apps.get_model(model).objects.filter(pk=pk)
+    name: str = queryset.values_list(field, flat=True).first()
+    if not name:
+        return
+    # INFO: запись только если файл не заменили во время обработки;
+    #       фотографии видны и в новостях, и в обращениях.
+    if queryset.filter(**{field: name}).update(
+        **{f'{field}_variants': images.make_variants(name)}
+    ):
+        bump_cache_versions_on_commit(
+            NEWS_CACHE_VERSION_KEY, APPEAL_CACHE_VERSION_KEY,
+        )
+    return
+
+
+def schedule_image_variants(instances: list[Model]) -> None:
+    """
+    Ставит в очередь создание копий изображений instances.
+
+    Задачи отправляются после фиксации транзакции, чтобы рабочий
+    процесс Celery увидел записанные строки и файлы.
+    """
+    for instance in instances:
+        if not getattr(instance, images.IMAGE_FIELDS[instance._meta.label]):
+            continue
+        transaction.on_commit(
+            lambda model=instance._meta.label, pk=instance.pk:
+            make_image_variants.delay(model=model, pk=pk)
+        )
     return
 
 
 @shared_task
-def send_mass_mail_async(subject: str, message: str) -> None:
-    """Задача по рассылке писем пользователям."""
-    user_emails: list[str] = User.objects.filter(
-        is_staff=False,
-        is_municipal=False,
-    ).values_list(
-        'email',
-        flat=True,
-    )
-    user_groups: list[list[str]] = [
-        user_emails[i:(i+CHUNK_EMAIL)] for
-        i in range(0, len(user_emails), CHUNK_EMAIL)
-    ]
-    celery_group: group = group(
-        send_mass_mail.s(
-            subject=subject,
-            message=message,
-            user_emails=user_group
-        ) for user_group in user_groups
-    )
-    celery_group.apply_async()
+def delete_expired_uploads() -> int:
+    """Задача по удалению незавершенных и неиспользованных загрузок."""
+    return uploads.delete_expired_uploads()
+
+
+@worker_process_shutdown.connect
+def close_worker_mail_connection(**kwargs) -> None:
+    """Закрывает соединение с почтовым сервером при остановке процесса."""
+    close_mail_connection()
     return
@@ -0,0 +1,109 @@
+"""
+Файлы загрузок частями (info.models.Upload).
+
+Каждая загрузка пишется в отдельный файл UPLOAD_TMP_DIR/<id>, части
+принимаются потоком, без буферизации всего файла в памяти. После
+завершения файл переносится в хранилище при создании новости.
+"""
+
+from contextlib import suppress
+from datetime import timedelta
+import os
+from typing import BinaryIO
+from uuid import UUID
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from info.models import Upload
+from urban_utopia_2024.app_data import (
+    UPLOAD_EXPIRE_HOURS, UPLOAD_READ_SIZE, UPLOAD_TMP_DIR,
+)
+
+
+def get_upload_path(upload_id: UUID) -> str:
+    return os.path.join(UPLOAD_TMP_DIR, str(upload_id))
+
+
+def write_chunk(
+    upload_id: UUID,
+    offset: int,
+    stream: BinaryIO,
+    length: int,
+) -> int:
+    """
+    Записывает в файл загрузки length байт из stream начиная с offset.
+
+    Данные после записанной части отбрасываются, поэтому повторная
+    отправка части с прежнего смещения безопасна. Возвращает смещение
+    после фактически записанных байт (меньше ожидаемого, если клиент
+    оборвал соединение).
+    """
+    os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+    path: str = get_upload_path(upload_id)
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+        file.seek(offset)
+        remaining: int = length
+        while remaining > 0:
+            data: bytes = stream.read(min(UPLOAD_READ_SIZE, remaining))
+            if not data:
+                break
+            file.write(data)
+            remaining -= len(data)
+        file.truncate()
+    return offset + length - remaining
+
+
+def is_image(upload_id: UUID) -> bool:
+    """Проверяет, что файл загрузки - изображение, читаемое Pillow."""
+    try:
+        with Image.open(get_upload_path(upload_id)) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError):
+        return False
+    return True
+
+
+def lock_uploads(upload_ids: list[UUID], user_id: int) -> dict[UUID, Upload]:
+    """Блокирует завершенные загрузки пользователя до конца транзакции."""
+    return {
+        upload.id: upload for upload in Upload.objects.select_for_update(
+        ).filter(
+            id__in=upload_ids,
+            user_id=user_id,
+            committed=True,
+        )
+    }
+
+
+def open_upload(upload: Upload) -> File:
+    """Открывает файл загрузки под исходным именем для записи в поле."""
+    return File(open(get_upload_path(upload.id), 'rb'), name=upload.filename)
+
+
+def delete_uploads(upload_ids: list[UUID]) -> None:
+    """Удаляет загрузки, а их файлы - после фиксации транзакции."""
+    upload_ids: list[UUID] = list(upload_ids)
+    Upload.objects.filter(id__in=upload_ids).delete()
+    transaction.on_commit(lambda: _delete_files(upload_ids))
+    return
+
+
+def delete_expired_uploads() -> int:
+    """Удаляет загрузки старше UPLOAD_EXPIRE_HOURS часов."""
+    upload_ids: list[UUID] = list(
+        Upload.objects.filter(
+            pub_date__lt=timezone.now() - timedelta(hours=UPLOAD_EXPIRE_HOURS),
+        ).values_list('id', flat=True)
+    )
+    delete_uploads(upload_ids)
+    return len(upload_ids)
+
+
+def _delete_files(upload_ids: list[UUID]) -> None:
+    for upload_id in upload_ids:
+        with suppress(FileNotFoundError):
+            os.remove(get_upload_path(upload_id))
+    return
@@ -0,0 +1,120 @@
+from datetime import timedelta
+import uuid
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+import redis
+
+from api.v1.utils import bump_cache_versions_on_commit, get_redis_client
+from info.models import Answer, AnswerUser, VoteFlush
+from urban_utopia_2024.app_data import (
+    NEWS_CACHE_VERSION_KEY, VOTE_COUNTS_KEY, VOTE_FLUSH_BATCH_SIZE,
+    VOTE_FLUSH_EXPIRE_HOURS, VOTE_FLUSH_ID_FIELD, VOTE_FLUSH_INTERVAL,
+    VOTE_FLUSH_LOCK_KEY,
+)
+
+VOTE_COUNTS_FLUSHING_KEY: str = f'{VOTE_COUNTS_KEY}:flushing'
+
+
+def record_vote(answer_id: int, user_id: int) -> bool:
+    """
+    Записывает голос пользователя user_id за ответ answer_id.
+
+    Повторный голос игнорируется ограничением unique_answer_user
+    (INSERT ... ON CONFLICT DO NOTHING), поэтому запрос идемпотентен.
+    Счетчик голосов ответа не обновляется в БД, а увеличивается в
+    буфере Redis после фиксации транзакции (см. flush_vote_counts);
+    при недоступном Redis - сразу в БД. Возвращает True, если голос
+    записан впервые.
+    """
+    meta = AnswerUser._meta
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(meta.db_table)} '
+            f'({quote_name(meta.get_field("answer").column)}, '
+            f'{quote_name(meta.get_field("user").column)}) '
+            'VALUES (%s, %s) ON CONFLICT DO NOTHING '
+            f'RETURNING {quote_name(meta.pk.column)}',
+            (answer_id, user_id),
+        )
+        created: bool = cursor.fetchone() is not None
+    if created:
+        transaction.on_commit(lambda: _add_vote(answer_id=answer_id))
+    return created
+
+
+def _add_vote(answer_id: int) -> None:
+    try:
+        get_redis_client().hincrby(VOTE_COUNTS_KEY, answer_id, 1)
+    except redis.RedisError:
+        Answer.objects.filter(id=answer_id).update(
+            vote_count=F('vote_count') + 1,
+        )
+        bump_cache_versions_on_commit(NEWS_CACHE_VERSION_KEY)
+    return
+
+
+def flush_vote_counts() -> int:
+    """
+    Переносит накопленные в Redis приросты голосов в Answer.vote_count.
+
+    Буфер атомарно переименовывается, так что новые голоса копятся в
+    новом хеше, пока старый записывается в БД одним UPDATE на пачку
+    ответов. Буфер получает id, который записывается в VoteFlush в той
+    же транзакции: буфер, оставшийся после сбоя до фиксации, применяется
+    при следующем запуске, а после фиксации - только удаляется.
+    Возвращает количество обновленных ответов.
+    """
+    client: redis.Redis = get_redis_client()
+    lock = client.lock(VOTE_FLUSH_LOCK_KEY, timeout=VOTE_FLUSH_INTERVAL * 6)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        if not client.exists(VOTE_COUNTS_FLUSHING_KEY):
+            try:
+                client.rename(VOTE_COUNTS_KEY, VOTE_COUNTS_FLUSHING_KEY)
+            except redis.ResponseError:
+                return 0
+        client.hsetnx(
+            VOTE_COUNTS_FLUSHING_KEY, VOTE_FLUSH_ID_FIELD, uuid.uuid4().hex,
+        )
+        buffer: dict[bytes, bytes] = client.hgetall(VOTE_COUNTS_FLUSHING_KEY)
+        flush_id: uuid.UUID = uuid.UUID(
+            buffer.pop(VOTE_FLUSH_ID_FIELD.encode()).decode()
+        )
+        counts: list[tuple[int, int]] = [
+            (int(answer_id), int(count))
+            for answer_id, count in buffer.items()
+        ]
+        with transaction.atomic():
+            _, created = VoteFlush.objects.get_or_create(flush_id=flush_id)
+            VoteFlush.objects.filter(
+                pub_date__lt=timezone.now() - timedelta(
+                    hours=VOTE_FLUSH_EXPIRE_HOURS,
+                ),
+            ).delete()
+            if not created:
+                counts: list[tuple[int, int]] = []
+            for i in range(0, len(counts), VOTE_FLUSH_BATCH_SIZE):
+                batch: list[tuple[int, int]] = counts[
+                    i:(i+VOTE_FLUSH_BATCH_SIZE)
+                ]
+                Answer.objects.filter(
+                    id__in=[answer_id for answer_id, _ in batch],
+                ).update(
+                    vote_count=F('vote_count') + Case(
+                        *(
+                            When(id=answer_id, then=Value(count))
+                            for answer_id, count in batch
+                        ),
+                        default=Value(0),
+                    ),
+                )
+        client.delete(VOTE_COUNTS_FLUSHING_KEY)
+    finally:
+        lock.release()
+    if counts:
+        bump_cache_versions_on_commit(NEWS_CACHE_VERSION_KEY)
+    return len(counts)
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -32,9 +33,182 @@ else:
 
 """Django data."""
 
-# Указывает по сколько группировать пользователей для рассылки
-# писем через info.tasks.send_mass_mail_async задачу Celery.
-CHUNK_EMAIL: int = 10
+# Рассылка писем (info.tasks.send_mass_mail_async) делится на задачи
+# Celery по диапазонам id получателей: размер диапазона подбирается так,
+# чтобы задач было около MAIL_TASKS_TARGET, но не меньше CHUNK_EMAIL_MIN
+# и не больше CHUNK_EMAIL_MAX получателей (info.mailing).
+CHUNK_EMAIL_MAX: int = 100
+CHUNK_EMAIL_MIN: int = 10
+MAIL_TASKS_TARGET: int = 50
+
+# Ограничение скорости отправки писем всеми рабочими процессами по
+# тарифу почтового сервиса (info.mailing.acquire_mail_tokens): корзина
+# токенов в Redis пополняется на MAIL_RATE_PER_SECOND писем в секунду до
+# MAIL_RATE_BURST. Задача берет токены сразу на все свои письма, поэтому
+# MAIL_RATE_BURST должен быть не меньше CHUNK_EMAIL_MAX.
+MAIL_RATE_BURST: int = int(os.getenv('MAIL_RATE_BURST', 100))
+MAIL_RATE_KEY: str = 'mail_rate'
+MAIL_RATE_PER_SECOND: float = float(os.getenv('MAIL_RATE_PER_SECOND', 10))
+# Повторы задач рассылки при временных ошибках почтового сервера: через
+# MAIL_RETRY_BACKOFF * 2 ** номер повтора, но не больше
+# MAIL_RETRY_BACKOFF_MAX секунд. Ответ сервера 4xx (превышен лимит)
+# приостанавливает отправку всеми процессами на ту же задержку.
+MAIL_RETRY_BACKOFF: int = 10
+MAIL_RETRY_BACKOFF_MAX: int = 60 * 10
+MAIL_RETRY_MAX: int = 8
+MAIL_THROTTLE_KEY: str = 'mail_throttle'
+# Лимиты времени задачи рассылки (сек): по мягкому задача прерывается и
+# ставится на повтор, по жесткому рабочий процесс перезапускается.
+MAIL_TASK_SOFT_TIME_LIMIT: int = 60
+MAIL_TASK_TIME_LIMIT: int = 90
+# Лимиты времени задач, ставящих в очередь задачи рассылки (сек): по
+# мягкому задача ставится на повтор и продолжает с последней
+# поставленной страницы получателей.
+MAIL_PRODUCER_SOFT_TIME_LIMIT: int = 120
+MAIL_PRODUCER_TIME_LIMIT: int = 150
+# Соединение с почтовым сервером, простаивавшее дольше
+# MAIL_CONNECTION_CHECK_INTERVAL сек, проверяется командой NOOP перед
+# отправкой (api.v1.utils.get_mail_connection).
+MAIL_CONNECTION_CHECK_INTERVAL: int = 5
+# Статусы получателей рассылки (info.models.MailingRecipient)
+# отмечаются пачками по MAILING_MARK_BATCH_SIZE писем: после сбоя
+# задача продолжает с неотмеченных получателей.
+MAILING_MARK_BATCH_SIZE: int = 20
+
+# Ключ адреса (Address.key) разрешается в идентификатор адреса через
+# кэш процесса (LRU) и общий кэш Redis (api.v1.utils.resolve_address).
+ADDRESS_KEY_CACHE_PREFIX: str = 'address_key'
+ADDRESS_KEY_CACHE_SIZE: int = 4096
+ADDRESS_KEY_CACHE_TIMEOUT: int = 60 * 60 * 24
+# Ключ версии кэшей адресов: меняется при изменении и удалении адресов,
+# что делает записи кэшей прежней версии недоступными (info.signals).
+# Процесс перечитывает версию не чаще раза в ADDRESS_KEY_VERSION_TTL сек.
+ADDRESS_KEY_CACHE_VERSION_KEY: str = 'address_key_version'
+ADDRESS_KEY_VERSION_TTL: int = 5
+
+# Ключ версии обращений: меняется при любой записи в обращения
+# и используется для валидаторов условных GET-запросов (info.signals).
+APPEAL_CACHE_VERSION_KEY: str = 'appeal_cache_version'
+
+# Количество строк, получаемых из курсора БД за раз при выгрузке
+# обращений (api.v1.views.AppealViewSet.export).
+APPEAL_EXPORT_CHUNK_SIZE: int = 2000
+APPEAL_EXPORT_CSV: str = 'csv'
+APPEAL_EXPORT_NDJSON: str = 'ndjson'
+APPEAL_EXPORT_FORMATS: list[tuple[str]] = [
+    (APPEAL_EXPORT_CSV, 'CSV'),
+    (APPEAL_EXPORT_NDJSON, 'NDJSON'),
+]
+# Столбцы выгрузки обращений: поля Appeal и связанных моделей.
+APPEAL_EXPORT_FIELDS: tuple[str] = (
+    'id',
+    'pub_date',
+    'status',
+    'topic',
+    'text',
+    'answer',
+    'rating',
+    'user_id',
+    'user__email',
+    'municipal_id',
+    'municipal__municipal_name',
+    'address__city',
+    'address__district',
+    'address__street',
+    'address__house',
+    'address__building',
+    'address__apartment',
+)
+
+# Максимальное количество новостей в одном запросе пакетной публикации
+# (api.v1.views.NewsViewSet.batch).
+NEWS_BATCH_SIZE_MAX: int = 50
+
+# Время жизни (сек) закэшированных ответов списка и страниц новостей.
+NEWS_CACHE_TIMEOUT: int = 60 * 10
+# Ключ версии кэша новостей: меняется при любой записи в новости,
+# комментарии, картинки и опросы, что делает старые записи кэша
+# недоступными (info.signals).
+NEWS_CACHE_VERSION_KEY: str = 'news_cache_version'
+
+# Количество последних комментариев, встраиваемых в представление
+# новости (полный список - в /api/v1/news/{id}/comments/).
+NEWS_COMMENT_PREVIEW: int = 3
+
+# Дайджест новостей (info.tasks.send_news_digest_async): пользователи с
+# режимом hourly/daily раз в период получают одно письмо со всеми
+# новостями своих подписок (daily - в NEWS_DIGEST_DAILY_HOUR часов).
+# Новости моложе NEWS_DIGEST_DELAY секунд переходят в следующий период,
+# чтобы не пропустить еще не зафиксированные транзакции. Ход отправки
+# дайджеста хранится в Redis (NEWS_DIGEST_PROGRESS_KEY) до ее окончания.
+NEWS_DIGEST_DAILY_HOUR: int = 9
+NEWS_DIGEST_DELAY: int = 60
+NEWS_DIGEST_LAST_KEY: str = 'news_digest_last'
+NEWS_DIGEST_PROGRESS_KEY: str = 'news_digest_progress'
+
+# Размер страницы ленты новостей (по умолчанию и максимальный).
+NEWS_PAGE_SIZE: int = 20
+NEWS_PAGE_SIZE_MAX: int = 100
+
+# Уменьшенные копии картинок новостей и фотографий пользователей
+# (info.images): {название: (наибольшая сторона в пикселях, формат)},
+# формат None - формат оригинала. Копии сохраняются рядом с оригиналом.
+IMAGE_VARIANTS: dict[str, tuple[int, str]] = {
+    'thumbnail': (320, None),
+    'medium': (1024, None),
+    'webp': (1024, 'WEBP'),
+}
+IMAGE_VARIANT_QUALITY: int = 85
+# Лимиты времени задачи создания копий (сек): больше общего
+# CELERY_TASK_TIME_LIMIT, чтобы успевали большие фотографии.
+IMAGE_TASK_SOFT_TIME_LIMIT: int = 60
+IMAGE_TASK_TIME_LIMIT: int = 90
+
+# Загрузка картинок новостей частями (api.v1.views.UploadViewSet):
+# части пишутся в файл во временном каталоге, незавершенные загрузки
+# удаляются задачей info.tasks.delete_expired_uploads.
+UPLOAD_CHUNK_MAX_SIZE: int = 1024 * 1024
+UPLOAD_EXPIRE_HOURS: int = 24
+UPLOAD_MAX_SIZE: int = 20 * 1024 * 1024
+UPLOAD_READ_SIZE: int = 64 * 1024
+UPLOAD_TMP_DIR: str = os.getenv(
+    'UPLOAD_TMP_DIR',
+    os.path.join(tempfile.gettempdir(), 'urban_utopia_2024_uploads'),
+)
+
+# Исходящие задачи Celery (info.models.Outbox) отправляются брокеру
+# задачей info.tasks.relay_outbox раз в OUTBOX_RELAY_INTERVAL секунд
+# пачками по OUTBOX_BATCH_SIZE, не больше OUTBOX_RELAY_MAX_BATCHES пачек
+# за запуск.
+OUTBOX_BATCH_SIZE: int = 100
+OUTBOX_RELAY_INTERVAL: int = 2
+OUTBOX_RELAY_MAX_BATCHES: int = 20
+
+# Очереди задач Celery (urban_utopia_2024.celery): письма пользователям
+# (код подтверждения, регистрация), массовые рассылки и служебные задачи.
+# Каждую очередь обслуживает отдельный сервис рабочих процессов со своими
+# числом процессов и предвыборкой (docker-compose.yml).
+CELERY_QUEUE_BULK_MAIL: str = 'bulk_mail'
+CELERY_QUEUE_MAIL: str = 'mail'
+CELERY_QUEUE_MAINTENANCE: str = 'maintenance'
+
+# Сверка рейтинга муниципальных служб с оценками обращений
+# (info.tasks.reconcile_municipal_ratings): ежедневно в указанный час.
+RATING_RECONCILE_BATCH_SIZE: int = 500
+RATING_RECONCILE_HOUR: int = 3
+
+# Буфер голосов в Redis: хеш {id ответа: прирост голосов}, который
+# задача info.tasks.flush_vote_counts раз в VOTE_FLUSH_INTERVAL секунд
+# переносит в Answer.vote_count пачками по VOTE_FLUSH_BATCH_SIZE.
+# Перенесенный буфер отмечается в БД (info.models.VoteFlush) по id из
+# поля VOTE_FLUSH_ID_FIELD и не применяется повторно; отметки хранятся
+# VOTE_FLUSH_EXPIRE_HOURS часов.
+VOTE_COUNTS_KEY: str = 'vote_counts'
+VOTE_FLUSH_BATCH_SIZE: int = 500
+VOTE_FLUSH_EXPIRE_HOURS: int = 24
+VOTE_FLUSH_ID_FIELD: str = 'flush_id'
+VOTE_FLUSH_INTERVAL: int = 10
+VOTE_FLUSH_LOCK_KEY: str = 'vote_counts_flush_lock'
 
 DB_ENGINE: str = os.getenv('DB_ENGINE')
 DB_USER: str = os.getenv('POSTGRES_USER')
@@ -54,6 +228,12 @@ DATABASE_POSTGRESQL: dict[str, dict[str, str]] = {
     }
 }
 
+REDIS_URL: str = os.getenv(
+    'REDIS_URL', 'redis://urban_utopia_2024_redis:6379'
+)
+# Отдельная база Redis для счетчиков: cache.clear() их не затрагивает.
+REDIS_COUNTERS_URL: str = f'{REDIS_URL}/2'
+
 DATABASE_SQLITE: dict[str, dict[str, str]] = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -87,6 +267,28 @@ EMAIL_CONFIRM_EMAIL_TEXT: str = (
 
 EMAIL_NEWS_SUBJECT: str = 'Новости города | Информационный портал'
 
+EMAIL_NEWS_BATCH_TEXT: str = (
+    'На новостном портале появились новые новости!'
+    '\n\n'
+    'Ознакомиться с ними вы можете по ссылкам:'
+    '\n\n'
+    '{links}'
+    '\n\n'
+    'С наилучшими пожеланиями,\n'
+    'Команда администрации г.Екатеринбурга.'
+)
+
+EMAIL_NEWS_BATCH_LINK: str = '{category}: {link}'
+
+EMAIL_NEWS_DIGEST_TEXT: str = (
+    'Новости портала по вашим подпискам за {period}:'
+    '\n\n'
+    '{links}'
+    '\n\n'
+    'С наилучшими пожеланиями,\n'
+    'Команда администрации г.Екатеринбурга.'
+)
+
 EMAIL_NEWS_TEXT: str = (
     'На новостном портале появилась новость из категории {category}!'
     '\n\n'
@@ -167,6 +369,20 @@ ADDRESS_ENTRANCE_MAX_VAL: int = 50
 ADDRESS_FLOOR_MAX_VAL: int = 150
 ADDRESS_APARTMENT_MAX_VAL: int = 9999
 ADDRESS_INDEX_MAX_VAL: int = 999999
+# Поля адреса, из которых строится нормализованный ключ Address.key
+# (совпадают с ограничением уникальности адреса).
+ADDRESS_KEY_FIELDS: tuple[str] = (
+    'city',
+    'street',
+    'house',
+    'building',
+    'apartment',
+)
+ADDRESS_KEY_LEN: int = 64
+# Размер пачки UPDATE команды backfill_address_keys.
+ADDRESS_KEY_BACKFILL_BATCH_SIZE: int = 1000
+# Размер пачки INSERT команды backfill_subscriptions.
+SUBSCRIPTION_BACKFILL_BATCH_SIZE: int = 1000
 
 APPEAL_RATING_MAX_VAL: int = 10
 APPEAL_RATING_MESSAGE: str = 'Оценка не может быть меньше 0 и больше 10.'
@@ -184,6 +400,17 @@ APPEAL_STATUS_MAX_LEN: int = 20
 APPEAL_TEXT_MAX_LEN: int = 2048
 APPEAL_TOPIC_MAX_LEN: int = 50
 
+MAILING_STATUS_PENDING: str = 'pending'
+MAILING_STATUS_SENT: str = 'sent'
+MAILING_STATUS_FAILED: str = 'failed'
+MAILING_STATUS_CHOICES: list[tuple[str]] = [
+    (MAILING_STATUS_PENDING, 'Ожидает отправки'),
+    (MAILING_STATUS_SENT, 'Отправлено'),
+    (MAILING_STATUS_FAILED, 'Не доставлено'),
+]
+MAILING_STATUS_MAX_LEN: int = 10
+MAILING_SUBJECT_MAX_LEN: int = 150
+
 NEWS_CATEGORY_MAX_LEN: int = 10
 NEWS_CATEGORY_CHOICES: list[tuple[str]] = [
     ('Gas', 'Газ'),
@@ -196,6 +423,20 @@ NEWS_CATEGORY_CHOICES: list[tuple[str]] = [
 
 NEWS_COMMENT_MAX_LEN: int = 128
 NEWS_COMMENT_SLICE: int = 15
+NEWS_DIGEST_INSTANT: str = 'instant'
+NEWS_DIGEST_HOURLY: str = 'hourly'
+NEWS_DIGEST_DAILY: str = 'daily'
+NEWS_DIGEST_CHOICES: list[tuple[str]] = [
+    (NEWS_DIGEST_INSTANT, 'Сразу'),
+    (NEWS_DIGEST_HOURLY, 'Раз в час'),
+    (NEWS_DIGEST_DAILY, 'Раз в день'),
+]
+NEWS_DIGEST_MAX_LEN: int = 10
+# Длительность периода дайджеста (сек) и его название в письме.
+NEWS_DIGEST_PERIODS: dict[str, tuple[int, str]] = {
+    NEWS_DIGEST_HOURLY: (60 * 60, 'час'),
+    NEWS_DIGEST_DAILY: (60 * 60 * 24, 'день'),
+}
 NEWS_PICTURES_PATH: str = 'news/pictures/'
 NEWS_TEXT_MAX_LEN: int = 2048
 
@@ -203,6 +444,10 @@ QUIZ_ANSWER_MAX_LEN: int = 100
 QUIZ_ANSWER_SLICE: int = 10
 QUIZ_TITLE_MAX_LEN: int = 50
 
+OUTBOX_TASK_MAX_LEN: int = 150
+
+UPLOAD_FILENAME_MAX_LEN: int = 100
+
 TASK_TITLE_MAX_LEN: int = 50
 
 USER_FULL_EMAIL_MAX_LEN: int = 150
@@ -1,6 +1,11 @@
 import os
 
 from celery import Celery
+from kombu import Queue
+
+from urban_utopia_2024.app_data import (
+    CELERY_QUEUE_BULK_MAIL, CELERY_QUEUE_MAIL, CELERY_QUEUE_MAINTENANCE,
+)
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'urban_utopia_2024.settings')
 
@@ -8,4 +13,21 @@ app = Celery('urban_utopia_2024')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
+# INFO: массовые рассылки идут в свою очередь и не задерживают письма
+#       пользователям и служебные задачи. Рабочий процесс, запущенный
+#       без --queues, обслуживает все очереди.
+app.conf.task_queues = (
+    Queue(CELERY_QUEUE_MAIL),
+    Queue(CELERY_QUEUE_BULK_MAIL),
+    Queue(CELERY_QUEUE_MAINTENANCE),
+)
+app.conf.task_default_queue = CELERY_QUEUE_MAINTENANCE
+app.conf.task_routes = {
+    'info.tasks.send_mail_async': {'queue': CELERY_QUEUE_MAIL},
+    'info.tasks.send_mass_mail': {'queue': CELERY_QUEUE_BULK_MAIL},
+    'info.tasks.send_mass_mail_async': {'queue': CELERY_QUEUE_BULK_MAIL},
+    'info.tasks.send_news_digest': {'queue': CELERY_QUEUE_BULK_MAIL},
+    'info.tasks.send_news_digest_async': {'queue': CELERY_QUEUE_BULK_MAIL},
+}
+
 app.autodiscover_tasks()
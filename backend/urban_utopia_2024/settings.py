@@ -1,6 +1,7 @@
 from datetime import timedelta
 import os
 
+from celery.schedules import crontab
 from corsheaders.defaults import default_headers
 
 from urban_utopia_2024.app_data import (
@@ -11,7 +12,11 @@ from urban_utopia_2024.app_data import (
     EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER, EMAIL_HOST_PASSWORD,
     EMAIL_USE_TLS, EMAIL_USE_SSL, EMAIL_SSL_CERTFILE,
     EMAIL_SSL_KEYFILE, EMAIL_TIMEOUT,
-    CITE_DOMAIN, CITE_IP, SECRET_KEY,
+    CITE_DOMAIN, CITE_IP,
+    NEWS_DIGEST_DAILY, NEWS_DIGEST_DAILY_HOUR, NEWS_DIGEST_HOURLY,
+    OUTBOX_RELAY_INTERVAL,
+    RATING_RECONCILE_HOUR, REDIS_URL, SECRET_KEY,
+    VOTE_FLUSH_INTERVAL,
 )
 
 
@@ -26,9 +31,9 @@ AUTH_TYPE: str = AUTH_TOKEN
 """Celery settings."""
 
 
-CELERY_BROKER_URL = 'redis://urban_utopia_2024_redis:6379/0'
+CELERY_BROKER_URL = f'{REDIS_URL}/0'
 
-CELERY_RESULT_BACKEND = 'redis://urban_utopia_2024_redis:6379/0'
+CELERY_RESULT_BACKEND = f'{REDIS_URL}/0'
 
 CELERY_TASK_TRACK_STARTED = True
 
@@ -37,13 +42,45 @@ CELERY_TASK_TIME_LIMIT = 10
 CELERY_TIMEZONE = 'Europe/Moscow'
 
 CELERY_BEAT_SCHEDULE = {
-
+    'relay_outbox': {
+        'task': 'info.tasks.relay_outbox',
+        'schedule': OUTBOX_RELAY_INTERVAL,
+    },
+    'flush_vote_counts': {
+        'task': 'info.tasks.flush_vote_counts',
+        'schedule': VOTE_FLUSH_INTERVAL,
+    },
+    'delete_expired_uploads': {
+        'task': 'info.tasks.delete_expired_uploads',
+        'schedule': crontab(minute=0),
+    },
+    'send_news_digest_hourly': {
+        'task': 'info.tasks.send_news_digest_async',
+        'schedule': crontab(minute=0),
+        'kwargs': {'period': NEWS_DIGEST_HOURLY},
+    },
+    'send_news_digest_daily': {
+        'task': 'info.tasks.send_news_digest_async',
+        'schedule': crontab(hour=NEWS_DIGEST_DAILY_HOUR, minute=0),
+        'kwargs': {'period': NEWS_DIGEST_DAILY},
+    },
+    'reconcile_municipal_ratings': {
+        'task': 'info.tasks.reconcile_municipal_ratings',
+        'schedule': crontab(hour=RATING_RECONCILE_HOUR, minute=0),
+    },
 }
 
 
 """Django settings."""
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+    }
+}
+
 DATABASES = DATABASE_SQLITE if DEBUG_DB else DATABASE_POSTGRESQL
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -82,9 +119,20 @@ INSTALLED_APPS_LOCAL = [
 INSTALLED_APPS = INSTALLED_APPS_DJANGO + INSTALLED_APPS_THIRD_PARTY + INSTALLED_APPS_LOCAL
 
 REST_FRAMEWORK = {
+    # INFO: рендерер и парсер на базе orjson; если orjson не установлен,
+    #       они работают как стандартные JSONRenderer и JSONParser.
+    'DEFAULT_PARSER_CLASSES': [
+        'api.v1.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.v1.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
@@ -1,6 +1,12 @@
 from urban_utopia_2024.app_data import DATABASE_SQLITE
 from urban_utopia_2024.settings import *  # noqa F403
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 DATABASES = DATABASE_SQLITE
 
 SECRET_KEY = 'test_secret_key'
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from urban_utopia_2024.app_data import ADMIN_LIST_PER_PAGE
-from user.models import Address, ServiceCategory, User
+from user.models import Address, ServiceCategory, Subscription, User
 
 
 @admin.register(Address)
@@ -112,6 +112,40 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
     list_per_page = ADMIN_LIST_PER_PAGE
 
 
+@admin.register(Subscription)
+class SubscriptionAdmin(admin.ModelAdmin):
+    """
+    Переопределяет административный интерфейс Django для модели Subscription.
+
+    Атрибуты:
+        - list_display (tuple) - список полей для отображения в интерфейсе:
+            - ID подписки (id)
+            - ID пользователя (user)
+            - категория новостей (category)
+            - наименование района (district)
+        - list_filter (tuple) - список фильтров:
+            - категория новостей (category)
+            - наименование района (district)
+        - search_fields (tuple) - список полей для поиска объектов:
+            - электронная почта пользователя (user__email)
+        - list_per_page (int) - количество объектов на одной странице
+    """
+    list_display = (
+        'id',
+        'user',
+        'category',
+        'district',
+    )
+    list_filter = (
+        'category',
+        'district',
+    )
+    search_fields = (
+        'user__email',
+    )
+    list_per_page = ADMIN_LIST_PER_PAGE
+
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     """
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from urban_utopia_2024.app_data import (
+    ADDRESS_KEY_BACKFILL_BATCH_SIZE, ADDRESS_KEY_FIELDS,
+)
+from user.models import Address
+
+
+class Command(BaseCommand):
+    """
+    Заполняет Address.key у адресов, созданных до его появления.
+
+    Адреса, отличающиеся только написанием (регистр, пробелы, 'ё'),
+    получают одинаковый ключ, поэтому ключ достается адресу с меньшим
+    id, а остальные остаются без ключа: api.v1.utils.resolve_address
+    находит для них адрес с ключом.
+    """
+
+    help = 'Заполняет нормализованный ключ адресов без ключа.'
+
+    def handle(self, *args, **options):
+        keys: set[str] = set(
+            Address.objects.filter(
+                key__isnull=False,
+            ).values_list('key', flat=True)
+        )
+        addresses: list[Address] = []
+        for address in Address.objects.filter(
+            key__isnull=True,
+        ).order_by('id').only('id', *ADDRESS_KEY_FIELDS).iterator():
+            key: str = Address.make_key(
+                **{
+                    field: getattr(address, field)
+                    for field in ADDRESS_KEY_FIELDS
+                }
+            )
+            if key in keys:
+                continue
+            keys.add(key)
+            address.key = key
+            addresses.append(address)
+        Address.objects.bulk_update(
+            addresses,
+            fields=('key',),
+            batch_size=ADDRESS_KEY_BACKFILL_BATCH_SIZE,
+        )
+        self.stdout.write(f'Заполнено ключей адресов: {len(addresses)}')
+        return
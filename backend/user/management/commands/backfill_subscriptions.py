@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from urban_utopia_2024.app_data import SUBSCRIPTION_BACKFILL_BATCH_SIZE
+from user.models import ServiceCategory, Subscription, User
+
+
+class Command(BaseCommand):
+    """
+    Подписывает пользователей на новости всех категорий во всех районах.
+
+    До появления подписок письмо о новости получали все пользователи,
+    поэтому при первом запуске (подписок еще нет) каждый пользователь
+    получает подписки, сохраняющие прежнюю рассылку. Если подписки уже
+    есть, команда ничего не делает: повторный запуск не возвращает
+    отписавшимся пользователям их подписки.
+    """
+
+    help = 'Создает подписки на все категории при переходе на подписки.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if Subscription.objects.exists():
+            self.stdout.write('Подписки уже заполнены.')
+            return
+        category_ids: list[int] = list(
+            ServiceCategory.objects.values_list('id', flat=True)
+        )
+        subscriptions: list[Subscription] = Subscription.objects.bulk_create(
+            (
+                Subscription(user_id=user_id, category_id=category_id)
+                for user_id in User.objects.filter(
+                    is_staff=False,
+                    is_municipal=False,
+                ).values_list('id', flat=True).iterator()
+                for category_id in category_ids
+            ),
+            batch_size=SUBSCRIPTION_BACKFILL_BATCH_SIZE,
+        )
+        self.stdout.write(f'Создано подписок: {len(subscriptions)}')
+        return
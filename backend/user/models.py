@@ -1,3 +1,5 @@
+import hashlib
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator
@@ -8,8 +10,10 @@ from phonenumber_field.modelfields import PhoneNumberField
 from urban_utopia_2024.app_data import (
     ADDRESS_APARTMENT_MAX_VAL, ADDRESS_BUILDING_MAX_LEN, ADDRESS_CITY_MAX_LEN,
     ADDRESS_DISTRICT_MAX_LEN, ADDRESS_INDEX_MAX_VAL, ADDRESS_ENTRANCE_MAX_VAL,
-    ADDRESS_FLOOR_MAX_VAL, ADDRESS_HOUSE_MAX_VAL, ADDRESS_STREET_MAX_LEN,
+    ADDRESS_FLOOR_MAX_VAL, ADDRESS_HOUSE_MAX_VAL, ADDRESS_KEY_FIELDS,
+    ADDRESS_KEY_LEN, ADDRESS_STREET_MAX_LEN,
     NEWS_CATEGORY_CHOICES, NEWS_CATEGORY_MAX_LEN,
+    NEWS_DIGEST_CHOICES, NEWS_DIGEST_INSTANT, NEWS_DIGEST_MAX_LEN,
     USER_FULL_EMAIL_MAX_LEN, USER_NAME_MAX_LEN, USER_PASS_MAX_LEN,
     USER_PHOTO_PATH, USER_RATING_MAX_VAL,
 )
@@ -20,6 +24,15 @@ from user.validators import (
 )
 
 
+def normalize_text(value) -> str:
+    """
+    Приводит значение к нижнему регистру, удаляет лишние пробелы и
+    заменяет 'ё' на 'е': записи, отличающиеся только написанием,
+    совпадают.
+    """
+    return ' '.join(str(value or '').split()).casefold().replace('ё', 'е')
+
+
 class Address(models.Model):
     """Модель адреса."""
 
@@ -102,6 +115,16 @@ class Address(models.Model):
             validate_lon,
         ),
     )
+    # INFO: нормализованный ключ адреса, заполняется в методе save();
+    #       у адресов, созданных до его появления, заполняется командой
+    #       backfill_address_keys.
+    key = models.CharField(
+        verbose_name='Ключ адреса',
+        max_length=ADDRESS_KEY_LEN,
+        unique=True,
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         constraints = (
@@ -128,6 +151,25 @@ class Address(models.Model):
             address: str = f'{address}, кв. {self.apartment}'
         return address
 
+    def save(self, *args, **kwargs):
+        self.key: str = self.make_key(
+            **{field: getattr(self, field) for field in ADDRESS_KEY_FIELDS}
+        )
+        return super().save(*args, **kwargs)
+
+    @staticmethod
+    def make_key(**fields) -> str:
+        """
+        Возвращает нормализованный ключ адреса из полей ADDRESS_KEY_FIELDS.
+
+        Значения нормализуются normalize_text, поэтому записи одного
+        адреса, отличающиеся только написанием, получают одинаковый ключ.
+        """
+        values: list[str] = [
+            normalize_text(fields.get(field)) for field in ADDRESS_KEY_FIELDS
+        ]
+        return hashlib.sha256('\x1f'.join(values).encode()).hexdigest()
+
 
 class ServiceCategory(models.Model):
     """Модель категорий услуг."""
@@ -241,6 +283,14 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    # INFO: уменьшенные копии фотографии, заполняются задачей
+    #       info.tasks.make_image_variants (info.images).
+    photo_variants = models.JSONField(
+        verbose_name='Копии фотографии',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     rating = models.DecimalField(
         verbose_name='Рейтинг',
         max_digits=4,
@@ -253,6 +303,14 @@ class User(AbstractUser):
         ),
         default=0.0,
     )
+    # INFO: режим писем о новостях подписок: сразу после публикации или
+    #       дайджестом раз в час/день (info.mailing).
+    news_digest = models.CharField(
+        verbose_name='Режим рассылки новостей',
+        max_length=NEWS_DIGEST_MAX_LEN,
+        choices=NEWS_DIGEST_CHOICES,
+        default=NEWS_DIGEST_INSTANT,
+    )
 
     # Fields for Municipal Services.
     is_municipal = models.BooleanField(
@@ -274,6 +332,18 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    # INFO: сумма и количество оценок ответов на обращения, по которым
+    #       поле rating хранит среднюю оценку службы. Обновляются вместе
+    #       с оценкой обращения и сверяются задачей
+    #       info.tasks.reconcile_municipal_ratings (info.ratings).
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+    )
 
     # Excess fields
     # Copy Django default, set value: None.
@@ -297,3 +367,64 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+
+class Subscription(models.Model):
+    """
+    Модель подписки пользователя на новости категории услуг.
+
+    Подписка без района (district=None) распространяется на новости
+    всех районов. Район хранится нормализованным (normalize_text) и
+    сравнивается с нормализованным районом адреса новости.
+    """
+
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        related_name='subscription',
+        on_delete=models.CASCADE,
+    )
+    category = models.ForeignKey(
+        verbose_name='Категория',
+        to=ServiceCategory,
+        related_name='subscription',
+        on_delete=models.CASCADE,
+    )
+    district = models.CharField(
+        verbose_name='Район',
+        max_length=ADDRESS_DISTRICT_MAX_LEN,
+        default=None,
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'category', 'district'),
+                name='unique_subscription',
+            ),
+            models.UniqueConstraint(
+                fields=('user', 'category'),
+                condition=models.Q(district__isnull=True),
+                name='unique_subscription_all_districts',
+            ),
+        )
+        # INFO: получатели рассылки новости выбираются по категории и
+        #       району (info.mailing.get_recipients) только по индексу.
+        indexes = (
+            models.Index(
+                fields=('category', 'district', 'user'),
+                name='subscription_recipient_idx',
+            ),
+        )
+        ordering = ('id',)
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user} - {self.category} ({self.district or "все"})'
+
+    def save(self, *args, **kwargs):
+        self.district: str = normalize_text(self.district) or None
+        return super().save(*args, **kwargs)